@@ -0,0 +1,510 @@
+"""
+Benchmarks for bond data ingestion and the bond analysis tabs.
+
+Runs against data/data.xlsx and synthetic replicas of it (10x, 100x, 1000x
+the rows) and prints one JSON object per measurement, so results can be
+stored and compared across commits:
+
+    python bench_bonds.py --scales 1,10,100 --output bench_results.jsonl
+
+Each record holds the benchmark name, scale, row count, and the best and
+median wall time over --repeat runs.
+"""
+import argparse
+import calendar
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+from bond_aggregates import (AGGREGATE_COLUMNS, aggregate_csv_chunked, build_aggregates,  # noqa: E402
+                             status_box_stats)
+from bond_cashflows import CASH_FLOW_COLUMNS, build_cash_flows  # noqa: E402
+from bond_charts import draw_box, render_png  # noqa: E402
+from bond_data import apply_bond_schema, read_snapshot, read_xlsx, validate_bonds, write_feather  # noqa: E402
+from bond_daycount import DAY_COUNT_NAMES, day_count_codes, year_fractions  # noqa: E402
+from bond_events import books_closed_periods, build_event_index  # noqa: E402
+from bond_floating import FLOATING_COLUMNS, project_floating  # noqa: E402
+from bond_lookup import LOOKUP_COLUMNS, build_bond_lookup  # noqa: E402
+from bond_risk import RISK_COLUMNS, aggregate_risk, bond_risk  # noqa: E402
+from bond_yields import YIELD_BRACKET, YIELD_COLUMNS, bond_yields, fixed_rate_rows  # noqa: E402
+
+DEFAULT_FILE = os.path.join("data", "data.xlsx")
+
+# Columns the per-bond analytics benchmarks read
+ANALYTICS_COLUMNS = list(dict.fromkeys(CASH_FLOW_COLUMNS + FLOATING_COLUMNS + YIELD_COLUMNS + RISK_COLUMNS
+                                      + LOOKUP_COLUMNS))
+
+# A two-index forward curve for the floating-rate projection benchmark
+FORWARD_CURVE = pd.DataFrame({
+    "Reference Rate": [pd.NA, pd.NA, "3 month JIBAR", "3 month JIBAR", "3 month JIBAR"],
+    "Tenor": [0.0, 10.0, 0.25, 1.0, 5.0],
+    "Rate": [8.0, 8.0, 7.5, 7.0, 6.5],
+})
+
+# Stands in for concurrent Streamlit sessions in the render benchmarks
+render_pool = ThreadPoolExecutor(max_workers=8)
+
+# name -> (function(context), largest scale it runs at, untimed setup(context) or None)
+BENCHMARKS = {}
+
+
+def benchmark(name, max_scale=1000, setup=None):
+    """
+    Register a benchmark. The function gets the per-scale context and returns
+    nothing; `setup`, if given, prepares the context before the timed runs.
+    """
+    def register(func):
+        BENCHMARKS[name] = (func, max_scale, setup)
+        return func
+    return register
+
+
+# -------------------------------------------
+# SYNTHETIC REPLICAS
+# -------------------------------------------
+def replicate(df, scale, seed=0):
+    """
+    Stack `scale` copies of the bond frame. Copies after the first get unique
+    ISINs/Alpha Codes, their own issuer names and jittered nominal amounts, so
+    group counts and value distributions grow with the data.
+    """
+    if scale == 1:
+        return df
+    rng = np.random.default_rng(seed)
+    parts = []
+    for k in range(scale):
+        part = df.copy()
+        if k:
+            for column in ("ISIN", "Alpha Code"):
+                if column in part.columns:
+                    part[column] = part[column].astype("string") + f"-{k}"
+            if "Issuer Name" in part.columns:
+                part["Issuer Name"] = part["Issuer Name"].astype("string") + f" #{k}"
+            if "Nominal Amount" in part.columns:
+                part["Nominal Amount"] = part["Nominal Amount"] * rng.uniform(0.5, 1.5, len(part))
+        parts.append(part)
+    return apply_bond_schema(pd.concat(parts, ignore_index=True))
+
+
+def build_context(base_raw, scale, workdir, max_ingest_scale):
+    """Frames and on-disk files a scale's benchmarks run against."""
+    context = {"scale": scale, "workdir": workdir}
+    typed = apply_bond_schema(base_raw)
+    # The analytics benchmarks only need the tab columns, which keeps 1000x affordable
+    context["view"] = replicate(typed[[c for c in AGGREGATE_COLUMNS if c in typed.columns]], scale)
+    context["rows"] = len(context["view"])
+    context["base"] = typed
+    if scale <= max_ingest_scale:
+        full = replicate(typed, scale)
+        context["raw"] = pd.concat([base_raw] * scale, ignore_index=True) if scale > 1 else base_raw
+        context["csv"] = os.path.join(workdir, f"bonds_x{scale}.csv")
+        full.to_csv(context["csv"], index=False)
+        context["feather"] = os.path.join(workdir, f"bonds_x{scale}.feather")
+        write_feather(full, context["feather"])
+    return context
+
+
+# -------------------------------------------
+# INGESTION
+# -------------------------------------------
+@benchmark("ingest.xlsx.pandas", max_scale=1)
+def bench_xlsx_pandas(context):
+    pd.read_excel(context["xlsx"])
+
+
+@benchmark("ingest.xlsx.streaming", max_scale=1)
+def bench_xlsx_streaming(context):
+    read_xlsx(context["xlsx"])
+
+
+@benchmark("ingest.xlsx.streaming_projected", max_scale=1)
+def bench_xlsx_projected(context):
+    read_xlsx(context["xlsx"], columns=AGGREGATE_COLUMNS)
+
+
+@benchmark("ingest.csv.pandas")
+def bench_csv(context):
+    pd.read_csv(context["csv"])
+
+
+@benchmark("ingest.csv.chunked_aggregate")
+def bench_csv_chunked(context):
+    with open(context["csv"], "rb") as fh:
+        aggregate_csv_chunked(fh)
+
+
+@benchmark("ingest.columnar.snapshot")
+def bench_snapshot(context):
+    read_snapshot(context["feather"])
+
+
+@benchmark("ingest.columnar.snapshot_projected")
+def bench_snapshot_projected(context):
+    read_snapshot(context["feather"], columns=AGGREGATE_COLUMNS)
+
+
+@benchmark("ingest.type_coercion")
+def bench_coercion(context):
+    apply_bond_schema(context["raw"])
+
+
+@benchmark("ingest.validation")
+def bench_validation(context):
+    if "typed" not in context:
+        context["typed"] = apply_bond_schema(context["raw"])
+    validate_bonds(context["raw"], context["typed"])
+
+
+# -------------------------------------------
+# TAB ANALYTICS
+# -------------------------------------------
+@benchmark("tabs.top_issuers.groupby_nlargest")
+def bench_top_issuers(context):
+    context["view"].groupby("Issuer Name", observed=True)["Nominal Amount"].sum().nlargest(15)
+
+
+@benchmark("tabs.year_filter.mask_copy")
+def bench_year_filter(context):
+    df = context["view"]
+    df[df["Maturity Date Year"] == 2025].copy()["Instrument Status"].value_counts()
+
+
+@benchmark("tabs.aggregates.build")
+def bench_build_aggregates(context):
+    build_aggregates(context["view"])
+
+
+def _aggregates(context):
+    if "aggregates" not in context:
+        context["aggregates"] = build_aggregates(context["view"])
+    return context["aggregates"]
+
+
+@benchmark("tabs.cube.box_stats")
+def bench_cube_box_stats(context):
+    _aggregates(context)["cube"].box_stats(["Instrument Status"])
+
+
+@benchmark("tabs.cube.year_status_lookup")
+def bench_cube_year_lookup(context):
+    _aggregates(context)["year_status_counts"].xs(2025, level="Maturity Date Year")
+
+
+@benchmark("tabs.status_box_stats")
+def bench_status_box_stats(context):
+    status_box_stats(context["view"])
+
+
+@benchmark("tabs.year_index.range")
+def bench_year_index_range(context):
+    _aggregates(context)["year_index"].counts(2020, 2030)
+
+
+@benchmark("tabs.issuer_ranking.page")
+def bench_issuer_ranking_page(context):
+    ranking = _aggregates(context)["issuer_ranking"]
+    ranking.page(ranking.pages(100), 100)
+
+
+# -------------------------------------------
+# PER-BOND ANALYTICS
+# -------------------------------------------
+def _bonds(context):
+    """Replica of the columns per-bond analytics read, built on first use at each scale."""
+    if "bonds" not in context:
+        typed = context["base"]
+        context["bonds"] = replicate(typed[[c for c in ANALYTICS_COLUMNS if c in typed.columns]], context["scale"])
+    return context["bonds"]
+
+
+@benchmark("analytics.cash_flows.build", max_scale=100)
+def bench_cash_flows(context):
+    build_cash_flows(_bonds(context))
+
+
+def _cash_flows(context):
+    if "cash_flows" not in context:
+        context["cash_flows"] = build_cash_flows(_bonds(context))
+    return context["cash_flows"]
+
+
+@benchmark("analytics.accrued_interest", max_scale=100)
+def bench_accrued_interest(context):
+    _cash_flows(context).accrued_interest("2025-06-30")
+
+
+@benchmark("analytics.floating.forward_curve", max_scale=100)
+def bench_floating_projection(context):
+    project_floating(_cash_flows(context), _bonds(context), "2025-06-30", FORWARD_CURVE, 50)
+
+
+@benchmark("analytics.yields.vectorized", max_scale=100)
+def bench_yields_vectorized(context):
+    bond_yields(_cash_flows(context), _bonds(context))
+
+
+def _risk(context):
+    if "risk" not in context:
+        context["risk"] = bond_risk(_cash_flows(context), _bonds(context), "2025-06-30")
+    return context["risk"]
+
+
+@benchmark("analytics.risk.build", max_scale=100)
+def bench_risk_build(context):
+    bond_risk(_cash_flows(context), _bonds(context), "2025-06-30")
+
+
+@benchmark("analytics.risk.aggregate_by_issuer", max_scale=100)
+def bench_risk_aggregate(context):
+    risk = _risk(context)
+    aggregate_risk(risk[risk["Rate Type"] == "Fixed"], "Issuer Name")
+
+
+@benchmark("analytics.events.build", max_scale=100)
+def bench_events_build(context):
+    build_event_index(_cash_flows(context), _bonds(context))
+
+
+def _prepare_events(context):
+    if "events" not in context:
+        context["events"] = build_event_index(_cash_flows(context), _bonds(context))
+        context["closed_periods"] = books_closed_periods(_cash_flows(context), _bonds(context))
+
+
+@benchmark("analytics.events.closed_on.index", max_scale=100, setup=_prepare_events)
+def bench_events_index(context):
+    for day in pd.date_range("2025-01-01", periods=30):
+        context["events"].closed_on(day)
+
+
+@benchmark("analytics.events.closed_on.scan", max_scale=100, setup=_prepare_events)
+def bench_events_scan(context):
+    # Without the index: test every books-closed period (listed and rule-derived) for each day
+    bond, close, pay = context["closed_periods"]
+    for day in pd.date_range("2025-01-01", periods=30).values.astype("datetime64[D]"):
+        bond[(close < day) & (pay > day)]
+
+
+@benchmark("analytics.lookup.build", max_scale=100)
+def bench_lookup_build(context):
+    build_bond_lookup(_bonds(context))
+
+
+def _lookup_codes(context):
+    """A hundred Alpha Codes to look up, typed in lower case as a user might."""
+    if "lookup_codes" not in context:
+        codes = _bonds(context)["Alpha Code"].dropna().astype(str).str.lower()
+        context["lookup_codes"] = codes.iloc[::max(len(codes) // 100, 1)].head(100).tolist()
+    return context["lookup_codes"]
+
+
+@benchmark("analytics.lookup.hash", max_scale=100)
+def bench_lookup_hash(context):
+    if "lookup" not in context:
+        context["lookup"] = build_bond_lookup(_bonds(context))
+    bonds = _bonds(context)
+    for code in _lookup_codes(context):
+        bonds.iloc[context["lookup"].find(code)]
+
+
+@benchmark("analytics.lookup.filter", max_scale=100)
+def bench_lookup_filter(context):
+    # Without the index: match the code against both columns of every row on each lookup
+    bonds = _bonds(context)
+    isin, alpha = bonds["ISIN"].astype("string").str.upper(), bonds["Alpha Code"].astype("string").str.upper()
+    for code in _lookup_codes(context):
+        code = code.strip().upper()
+        bonds[(isin == code) | (alpha == code)].head(1)
+
+
+def naive_yield(times, flows, price, frequency, guess=0.1, iterations=100, tolerance=1e-10):
+    """Per-bond reference solver: scalar Newton, then bisection if it does not settle."""
+    def value(y):
+        return sum(flow * (1.0 + y / frequency) ** (-frequency * t) for t, flow in zip(times, flows))
+
+    low, high = YIELD_BRACKET
+    y = guess
+    for _ in range(iterations):
+        pv = value(y)
+        if abs(pv - price) <= tolerance * max(price, 1.0):
+            return y
+        slope = sum(-flow * t * (1.0 + y / frequency) ** (-frequency * t - 1) for t, flow in zip(times, flows))
+        if slope == 0:
+            break
+        y = y - (pv - price) / slope
+        if not low < y < high:
+            break
+    if not value(low) >= price >= value(high):
+        return float("nan")
+    for _ in range(200):
+        mid = (low + high) / 2.0
+        low, high = (mid, high) if value(mid) > price else (low, mid)
+    return (low + high) / 2.0
+
+
+@benchmark("analytics.yields.per_bond", max_scale=10)
+def bench_yields_per_bond(context):
+    bonds, cash_flows = _bonds(context), _cash_flows(context)
+    issue = bonds["Issue Date"].to_numpy(dtype="datetime64[D]")
+    price = bonds["Issue Price"].to_numpy(dtype="float64")
+    nominal = bonds["Nominal Amount"].to_numpy(dtype="float64")
+    frequency = 12.0 / bonds["Coupon Frequency"].astype(object).map(
+        {"Monthly": 1, "Quarterly": 3, "Semi Annually": 6, "Annually": 12}).fillna(12).to_numpy(dtype="float64")
+    for row in fixed_rate_rows(bonds):
+        # Flows are ordered by bond, so each bond's are one slice
+        flows = np.arange(*np.searchsorted(cash_flows.bond, [row, row + 1]))
+        flows = flows[cash_flows.date[flows] > issue[row]]
+        times = (cash_flows.date[flows] - issue[row]).astype("int64") / 365.0
+        naive_yield(times, cash_flows.amount[flows] / nominal[row] * 100.0, price[row], frequency[row])
+
+
+def _accrual_periods(context):
+    """Issue-to-maturity periods of every dated bond, with its day-count code (Actual/365 when missing)."""
+    if "accrual_periods" not in context:
+        bonds = _bonds(context)
+        start = bonds["First Accural Date"].fillna(bonds["Issue Date"]).to_numpy(dtype="datetime64[D]")
+        end = bonds["Pricing Redemption Date"].to_numpy(dtype="datetime64[D]")
+        codes = day_count_codes(bonds["Day count convention"])
+        dated = ~np.isnat(start) & ~np.isnat(end)
+        context["accrual_periods"] = (start[dated], end[dated], np.where(codes[dated] < 0, 0, codes[dated]))
+    return context["accrual_periods"]
+
+
+def naive_year_fraction(start, end, convention):
+    """Per-date reference implementation of bond_daycount's conventions."""
+    if convention == "Actual/365":
+        return (end - start).days / 365.0
+    if convention == "Actual/360":
+        return (end - start).days / 360.0
+    if convention in ("30/360", "30E/360"):
+        d1, d2 = min(start.day, 30), end.day
+        if d2 == 31 and (convention == "30E/360" or d1 == 30):
+            d2 = 30
+        return (360 * (end.year - start.year) + 30 * (end.month - start.month) + d2 - d1) / 360.0
+    if start.year == end.year:
+        return (end - start).days / (366.0 if calendar.isleap(start.year) else 365.0)
+    head = (date_type(start.year + 1, 1, 1) - start).days / (366.0 if calendar.isleap(start.year) else 365.0)
+    tail = (end - date_type(end.year, 1, 1)).days / (366.0 if calendar.isleap(end.year) else 365.0)
+    return head + (end.year - start.year - 1) + tail
+
+
+@benchmark("analytics.day_count.vectorized")
+def bench_day_count_vectorized(context):
+    year_fractions(*_accrual_periods(context))
+
+
+@benchmark("analytics.day_count.per_row", max_scale=10)
+def bench_day_count_per_row(context):
+    start, end, codes = _accrual_periods(context)
+    [naive_year_fraction(s, e, DAY_COUNT_NAMES[code]) for s, e, code in zip(start.tolist(), end.tolist(), codes)]
+
+
+# -------------------------------------------
+# CHART RENDERING
+# -------------------------------------------
+def _render(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+
+
+@benchmark("charts.boxplot_by_status", max_scale=100)
+def bench_boxplot(context):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sns.boxplot(x="Instrument Status", y="Nominal Amount", data=context["view"], ax=ax)
+    _render(fig)
+
+
+@benchmark("charts.status_counts_for_year")
+def bench_countplot(context):
+    counts = build_aggregates(context["view"])["year_status_counts"].xs(2025, level="Maturity Date Year")
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sns.barplot(x=counts.values, y=counts.index, ax=ax)
+    _render(fig)
+
+
+@benchmark("charts.top_issuers_bar")
+def bench_issuer_bar(context):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    context["view"].groupby("Issuer Name", observed=True)["Nominal Amount"].sum().nlargest(15).plot(
+        kind="bar", ax=ax)
+    _render(fig)
+
+
+@benchmark("charts.render_pool.concurrent_box")
+def bench_render_pool(context):
+    # Eight sessions asking for the box chart at once, rendered on the bounded Agg pool
+    box_stats = _aggregates(context)["cube"].box_stats(["Instrument Status"])
+    futures = [render_pool.submit(render_png, lambda ax: draw_box(ax, box_stats, "Nominal Amount")) for _ in range(8)]
+    for future in futures:
+        future.result()
+
+
+# -------------------------------------------
+# RUNNER
+# -------------------------------------------
+def time_call(func, context, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(context)
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=DEFAULT_FILE, help="source workbook (default: data/data.xlsx)")
+    parser.add_argument("--scales", default="1,10,100,1000", help="comma-separated replica factors")
+    parser.add_argument("--max-ingest-scale", type=int, default=100,
+                        help="largest scale for which full-width CSV/columnar files are written")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument("--only", default="", help="run benchmarks whose name starts with this prefix")
+    parser.add_argument("--output", default="-", help="JSON-lines output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(",") if scale]
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    base_raw = read_xlsx(args.file)
+    meta = {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "machine": platform.machine(), "file": args.file}
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for scale in scales:
+                context = build_context(base_raw, scale, workdir, args.max_ingest_scale)
+                context["xlsx"] = args.file
+                for name, (func, max_scale, setup) in BENCHMARKS.items():
+                    if not name.startswith(args.only) or scale > max_scale:
+                        continue
+                    if name.startswith("ingest.") and "csv" not in context and not name.startswith("ingest.xlsx"):
+                        continue
+                    if setup is not None:
+                        setup(context)
+                    runs = time_call(func, context, args.repeat)
+                    record = dict(meta, benchmark=name, scale=scale, rows=context["rows"],
+                                  best_s=min(runs), median_s=statistics.median(runs), runs=len(runs))
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
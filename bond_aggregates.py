@@ -0,0 +1,504 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from bond_data import apply_bond_schema, upload_cache, upload_digest
+
+
+# -------------------------------------------
+# AGGREGATE CUBE
+# -------------------------------------------
+# Nominal Amount statistics per (Issuer Name, Maturity Date Year, Instrument
+# Status, Issue Type) cell, built once per dataset version. The bond tabs roll
+# the cube up instead of scanning the frame: counts and totals are sums over
+# cells, quantiles come from a per-cell logarithmic histogram (a mergeable
+# quantile sketch with bounded relative error).
+CUBE_DIMENSIONS = ["Issuer Name", "Maturity Date Year", "Instrument Status", "Issue Type"]
+AGGREGATE_COLUMNS = CUBE_DIMENSIONS + ["Nominal Amount"]
+
+SKETCH_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+# Amounts <= 0 share one bucket whose value is 0
+_ZERO_BUCKET = np.iinfo(np.int32).min
+
+
+def _bucket_of(amounts):
+    buckets = np.full(len(amounts), _ZERO_BUCKET, dtype=np.int32)
+    positive = amounts > 0
+    buckets[positive] = np.ceil(np.log(amounts[positive]) / _LOG_GAMMA)
+    return buckets
+
+
+def _bucket_value(buckets):
+    """Representative amount of each bucket, within SKETCH_RELATIVE_ACCURACY of every amount in it."""
+    zero = buckets == _ZERO_BUCKET
+    values = 2 * _GAMMA ** np.where(zero, 0, buckets).astype("float64") / (_GAMMA + 1)
+    values[zero] = 0.0
+    return values
+
+
+def _cube_keys(df):
+    """The cube dimensions of `df` as plain columns; absent dimensions are all missing."""
+    keys = {}
+    for column in CUBE_DIMENSIONS:
+        if column not in df.columns:
+            keys[column] = np.full(len(df), np.nan)
+        elif column == "Maturity Date Year":
+            keys[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            keys[column] = df[column].astype(object).to_numpy()
+    return pd.DataFrame(keys, index=df.index)
+
+
+def _where_mask(frame, where):
+    """Rows of a cube table matching {dimension: value or list of values}."""
+    mask = np.ones(len(frame), dtype=bool)
+    for column, value in (where or {}).items():
+        if pd.api.types.is_list_like(value):
+            mask &= frame[column].isin(list(value)).to_numpy()
+        else:
+            mask &= (frame[column] == value).to_numpy()
+    return mask
+
+
+class AggregateCube:
+    """
+    `cells`: one row per non-empty cell with Count (issues), Sum, Min and Max of
+    Nominal Amount. `sketch`: per cell and bucket, the number N of amounts in it.
+    Cubes over disjoint rows merge exactly, so a cube can be built chunk by chunk
+    or refreshed for a subset of cells.
+    """
+
+    def __init__(self, cells, sketch):
+        self.cells = cells
+        self.sketch = sketch
+
+    @classmethod
+    def build(cls, df):
+        frame = _cube_keys(df)
+        frame["Amount"] = (df["Nominal Amount"].astype("float64").to_numpy() if "Nominal Amount" in df.columns
+                           else np.nan)
+        cells = (frame.groupby(CUBE_DIMENSIONS, dropna=False, sort=False)["Amount"]
+                 .agg(Count="size", Sum="sum", Min="min", Max="max").reset_index())
+
+        amounts = frame[frame["Amount"].notna()]
+        sketch = (amounts[CUBE_DIMENSIONS].assign(Bucket=_bucket_of(amounts["Amount"].to_numpy()))
+                  .groupby(CUBE_DIMENSIONS + ["Bucket"], dropna=False, sort=False).size()
+                  .rename("N").reset_index())
+        return cls(cells, sketch)
+
+    @classmethod
+    def merge(cls, cubes):
+        """One cube over the union of the (disjoint) rows behind `cubes`."""
+        cells = (pd.concat([cube.cells for cube in cubes], ignore_index=True)
+                 .groupby(CUBE_DIMENSIONS, dropna=False, sort=False)
+                 .agg(Count=("Count", "sum"), Sum=("Sum", "sum"), Min=("Min", "min"), Max=("Max", "max"))
+                 .reset_index())
+        sketch = (pd.concat([cube.sketch for cube in cubes], ignore_index=True)
+                  .groupby(CUBE_DIMENSIONS + ["Bucket"], dropna=False, sort=False)["N"].sum()
+                  .reset_index())
+        return cls(cells, sketch)
+
+    def select(self, where):
+        """The sub-cube whose cells match {dimension: value or list of values}."""
+        return AggregateCube(self.cells[_where_mask(self.cells, where)],
+                             self.sketch[_where_mask(self.sketch, where)])
+
+    def without(self, issuers, years):
+        """The cube minus every cell of the given issuers or maturity years."""
+        def keep(frame):
+            return ~(frame["Issuer Name"].isin(list(issuers)) | frame["Maturity Date Year"].isin(list(years)))
+        return AggregateCube(self.cells[keep(self.cells)], self.sketch[keep(self.sketch)])
+
+    def _rollup(self, by, column, where):
+        cells = self.cells[_where_mask(self.cells, where)]
+        return cells.groupby(by, sort=True)[column].sum()
+
+    def counts(self, by, where=None):
+        """Number of issues per value of the `by` dimension(s); missing keys are left out."""
+        return self._rollup(by, "Count", where).astype("int64").rename("Count")
+
+    def totals(self, by, where=None):
+        """Total Nominal Amount per value of the `by` dimension(s)."""
+        return self._rollup(by, "Sum", where).rename("Nominal Amount")
+
+    def _grouped_sketch(self, by, where):
+        sketch = self.sketch[_where_mask(self.sketch, where)].dropna(subset=by)
+        grouped = sketch.groupby(by + ["Bucket"], sort=True)["N"].sum()
+        codes, groups = pd.factorize(grouped.index.droplevel("Bucket"))
+        values = _bucket_value(grouped.index.get_level_values("Bucket").to_numpy())
+        return codes, groups, values, grouped.to_numpy()
+
+    def _extremes(self, by, where, groups):
+        cells = self.cells[_where_mask(self.cells, where)].dropna(subset=by)
+        grouped = cells.groupby(by, sort=True)
+        return (grouped["Min"].min().reindex(groups).to_numpy(),
+                grouped["Max"].max().reindex(groups).to_numpy())
+
+    def quantiles(self, by, qs, where=None):
+        """
+        Approximate Nominal Amount quantiles per value of `by` (one column per q),
+        read from the sketch; exact at q=0 and q=1. Like status_box_stats, a
+        quantile interpolates linearly between the two amounts ranked around it,
+        so it stays within SKETCH_RELATIVE_ACCURACY of the exact value however
+        small the group.
+        """
+        qs = list(qs)
+        codes, groups, values, counts = self._grouped_sketch(by, where)
+        if not len(groups):
+            return pd.DataFrame(columns=qs, dtype="float64")
+        # Groups are contiguous and in order, so one running count serves every group
+        running = np.cumsum(counts)
+        sizes = np.bincount(codes, weights=counts)
+        starts = np.cumsum(sizes) - sizes
+        low, high = self._extremes(by, where, groups)
+        result = {}
+        def ranked(rank):
+            """The sketch's value for the amount at 0-based `rank` (counted across groups)."""
+            position = np.searchsorted(running, rank, side="right")
+            return np.clip(values[np.minimum(position, len(values) - 1)], low, high)
+
+        for q in qs:
+            if q <= 0 or q >= 1:
+                result[q] = low if q <= 0 else high
+                continue
+            rank = starts + q * (sizes - 1)
+            below, above = ranked(np.floor(rank)), ranked(np.ceil(rank))
+            result[q] = below + (above - below) * (rank - np.floor(rank))
+        return pd.DataFrame(result, index=groups)
+
+    def box_stats(self, by, where=None):
+        """
+        Boxplot statistics per value of `by` (quartiles and 1.5 IQR whiskers), as
+        the list of dicts Axes.bxp draws; outliers are not kept by the cube.
+        """
+        stats = self.quantiles(by, [0.25, 0.5, 0.75], where)
+        if stats.empty:
+            return []
+        codes, groups, values, _ = self._grouped_sketch(by, where)
+        low, high = self._extremes(by, where, groups)
+        q1, median, q3 = (stats[q].to_numpy() for q in (0.25, 0.5, 0.75))
+        spread = 1.5 * (q3 - q1)
+        # Whiskers reach the most extreme amounts still inside the fences
+        inside_low = values >= (q1 - spread)[codes]
+        inside_high = values <= (q3 + spread)[codes]
+        whislo = pd.Series(values[inside_low]).groupby(codes[inside_low]).min().reindex(range(len(groups)))
+        whishi = pd.Series(values[inside_high]).groupby(codes[inside_high]).max().reindex(range(len(groups)))
+        whislo = np.clip(whislo.fillna(pd.Series(q1)).to_numpy(), low, q1)
+        whishi = np.clip(whishi.fillna(pd.Series(q3)).to_numpy(), q3, high)
+        return [
+            {"label": str(group), "q1": q1[i], "med": median[i], "q3": q3[i],
+             "whislo": whislo[i], "whishi": whishi[i], "fliers": []}
+            for i, group in enumerate(groups)
+        ]
+
+    def memory_usage(self):
+        return int(self.cells.memory_usage(deep=True).sum() + self.sketch.memory_usage(deep=True).sum())
+
+
+# -------------------------------------------
+# MATURITY YEAR INDEX
+# -------------------------------------------
+class YearStatusIndex:
+    """
+    Issue counts per Instrument Status, answerable for any single maturity year
+    or year range without touching the rows: a (year x status) matrix of running
+    totals over the sorted years, so a range is one subtraction of two rows.
+    """
+
+    def __init__(self, year_status_counts):
+        table = year_status_counts.unstack("Instrument Status", fill_value=0).sort_index()
+        self.years = table.index.to_numpy(dtype="int64")
+        self.statuses = pd.Index(table.columns, dtype=object, name="Instrument Status")
+        self.cumulative = np.vstack([np.zeros((1, len(self.statuses)), dtype="int64"),
+                                     np.cumsum(table.to_numpy(dtype="int64"), axis=0)])
+
+    def __contains__(self, year):
+        position = np.searchsorted(self.years, year)
+        return position < len(self.years) and self.years[position] == year
+
+    def counts(self, start, end=None):
+        """Issues per status maturing in years start..end (inclusive); statuses with none are left out."""
+        end = start if end is None else end
+        low = np.searchsorted(self.years, start, side="left")
+        high = np.searchsorted(self.years, end, side="right")
+        counts = pd.Series(self.cumulative[high] - self.cumulative[low], index=self.statuses, name="Count")
+        return counts[counts > 0]
+
+
+# -------------------------------------------
+# ISSUER RANKING
+# -------------------------------------------
+class IssuerRanking:
+    """
+    The issuer league table: total Nominal Amount per issuer, sorted once
+    (largest first, ties by name) so any top-N or page is a positional slice.
+    """
+
+    def __init__(self, issuer_totals):
+        totals = issuer_totals.dropna()
+        order = np.lexsort((totals.index.to_numpy(dtype=object).astype(str), -totals.to_numpy()))
+        self.table = pd.DataFrame({
+            "Rank": np.arange(1, len(totals) + 1),
+            "Issuer Name": totals.index.to_numpy(dtype=object)[order],
+            "Nominal Amount": totals.to_numpy()[order],
+        })
+        grand_total = self.table["Nominal Amount"].sum()
+        self.table["Share"] = self.table["Nominal Amount"] / grand_total if grand_total else 0.0
+
+    def __len__(self):
+        return len(self.table)
+
+    def top(self, n):
+        """Issuer Name -> Nominal Amount for the n largest issuers."""
+        return self.table.iloc[:n].set_index("Issuer Name")["Nominal Amount"]
+
+    def page(self, number, size):
+        """Rows of the league table on 1-based page `number` of `size` rows."""
+        start = (number - 1) * size
+        return self.table.iloc[start:start + size]
+
+    def pages(self, size):
+        return max(-(-len(self) // size), 1)
+
+
+# -------------------------------------------
+# BOXPLOT STATISTICS
+# -------------------------------------------
+# Exact per-status boxplot statistics, so the distribution tab draws a fixed
+# number of boxes and points however many rows the dataset has.
+MAX_FLIERS_PER_STATUS = 200
+
+
+def status_box_stats(df, max_fliers=MAX_FLIERS_PER_STATUS, seed=0):
+    """
+    Nominal Amount boxplot statistics per Instrument Status, from one sort of
+    the amounts: quartiles (linear interpolation, as matplotlib uses), 1.5 IQR
+    whiskers, and up to `max_fliers` outliers per status (always including the
+    most extreme on each side, the rest drawn at random). Returns the list of
+    dicts Axes.bxp draws, with "n" and "n_fliers" added.
+    """
+    if not {"Instrument Status", "Nominal Amount"}.issubset(df.columns):
+        return []
+    data = df[["Instrument Status", "Nominal Amount"]].dropna()
+    codes, groups = pd.factorize(data["Instrument Status"].astype(object), sort=True)
+    if not len(groups):
+        return []
+    amounts = data["Nominal Amount"].to_numpy(dtype="float64")
+    order = np.lexsort((amounts, codes))
+    codes, values = codes[order], amounts[order]
+    sizes = np.bincount(codes, minlength=len(groups))
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+
+    def quantile(q):
+        position = starts + q * (sizes - 1)
+        low = np.floor(position).astype("int64")
+        high = np.ceil(position).astype("int64")
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    spread = 1.5 * (q3 - q1)
+    below = values < (q1 - spread)[codes]
+    above = values > (q3 + spread)[codes]
+    # Values are sorted within each group, so the whiskers sit just inside the outliers
+    whislo = values[starts + np.bincount(codes[below], minlength=len(groups))]
+    whishi = values[ends - 1 - np.bincount(codes[above], minlength=len(groups))]
+
+    flier_index = np.flatnonzero(below | above)
+    flier_codes = codes[flier_index]
+    keys = np.random.default_rng(seed).random(len(flier_index))
+    extreme = (flier_index == starts[flier_codes]) | (flier_index == ends[flier_codes] - 1)
+    keys[extreme] = -1.0
+    ranked = np.lexsort((keys, flier_codes))
+    flier_sizes = np.bincount(flier_codes, minlength=len(groups))
+    rank = np.arange(len(ranked)) - (np.cumsum(flier_sizes) - flier_sizes)[flier_codes[ranked]]
+    kept = flier_index[np.sort(ranked[rank < max_fliers])]
+    fliers = np.split(values[kept], np.searchsorted(codes[kept], np.arange(1, len(groups))))
+
+    return [
+        {"label": str(group), "q1": q1[i], "med": median[i], "q3": q3[i], "whislo": whislo[i],
+         "whishi": whishi[i], "fliers": fliers[i], "n": int(sizes[i]), "n_fliers": int(flier_sizes[i])}
+        for i, group in enumerate(groups)
+    ]
+
+
+# -------------------------------------------
+# DERIVED AGGREGATES FOR THE BOND TABS
+# -------------------------------------------
+# "cube":               the AggregateCube itself
+# "issuer_totals":      Issuer Name -> total Nominal Amount
+# "year_status_counts": (Maturity Date Year, Instrument Status) -> number of issues
+# "year_index":         YearStatusIndex over year_status_counts
+# "issuer_ranking":     IssuerRanking over issuer_totals
+def aggregates_from_cube(cube):
+    """The aggregates dict the bond tabs read, rolled up from a cube."""
+    issuer_totals = cube.totals(["Issuer Name"])
+    issuer_totals.index = pd.Index(issuer_totals.index, dtype=object, name="Issuer Name")
+
+    year_status_counts = cube.counts(["Maturity Date Year", "Instrument Status"])
+    year_status_counts.index = pd.MultiIndex.from_arrays(
+        [year_status_counts.index.get_level_values(0).astype("int64"),
+         year_status_counts.index.get_level_values(1).astype(object)],
+        names=["Maturity Date Year", "Instrument Status"],
+    )
+    return {"cube": cube, "issuer_totals": issuer_totals, "year_status_counts": year_status_counts,
+            "year_index": YearStatusIndex(year_status_counts), "issuer_ranking": IssuerRanking(issuer_totals)}
+
+
+def build_aggregates(df):
+    """Compute every aggregate the bond tabs read from a full scan of `df`."""
+    return aggregates_from_cube(AggregateCube.build(df))
+
+
+def refresh_aggregates(aggregates, df, issuers, years):
+    """
+    Recompute only the cube cells for the given issuers and maturity years from
+    `df` (the updated dataset), leaving every other cell as is.
+    """
+    issuers = list(issuers)
+    years = [int(year) for year in years]
+    if not issuers and not years:
+        return aggregates
+    rows = df[df["Issuer Name"].isin(issuers) | df["Maturity Date Year"].isin(years)]
+    cube = AggregateCube.merge([aggregates["cube"].without(issuers, years), AggregateCube.build(rows)])
+    return aggregates_from_cube(cube)
+
+
+# -------------------------------------------
+# CHUNKED AGGREGATION FOR VERY LARGE CSV FILES
+# -------------------------------------------
+# Large CSV uploads are never materialised in full: they are read in chunks
+# sized to a memory cap, and each chunk is folded into the same aggregates
+# build_aggregates() produces, plus a bounded uniform sample per Instrument
+# Status for the distribution tab.
+CSV_MEMORY_CAP_MB = int(os.environ.get("BOND_CSV_MEMORY_CAP_MB", "256"))
+LARGE_CSV_BYTES = int(os.environ.get("BOND_LARGE_CSV_MB", "50")) * 1024 * 1024
+SAMPLE_ROWS_PER_STATUS = 5000
+
+# Parsing and typing a chunk peaks at about this multiple of its raw CSV bytes
+# (measured on data.xlsx-shaped extracts: ~1.4 KB per 450-byte line)
+_PARSE_FACTOR = 3
+# Share of the memory cap held back for the per-status sample (sized with the
+# same factor); chunks get the rest
+_SAMPLE_SHARE = 0.25
+_PROBE_LINES = 2000
+
+
+def _row_bytes(source):
+    """Mean raw CSV bytes per data row, from the first _PROBE_LINES lines after the header."""
+    start = source.tell()
+    source.readline()
+    lines = [source.readline() for _ in range(_PROBE_LINES)]
+    source.seek(start)
+    lines = [line for line in lines if line]
+    return max(sum(len(line) for line in lines) / max(len(lines), 1), 1)
+
+
+def _sample_quota(sample, row_bytes, memory_cap_mb):
+    """Rows per status the sample may keep within its share of the memory cap."""
+    budget_rows = int(memory_cap_mb * 1024 * 1024 * _SAMPLE_SHARE / (row_bytes * _PARSE_FACTOR))
+    statuses = max(sample["Instrument Status"].nunique(dropna=False), 1)
+    return max(min(SAMPLE_ROWS_PER_STATUS, budget_rows // statuses), 1)
+
+
+def aggregate_csv_chunked(source, memory_cap_mb=CSV_MEMORY_CAP_MB, progress=None, seed=0):
+    """
+    Aggregate a CSV file object in chunks. `progress`, if given, is called with
+    the fraction of the file consumed after each chunk. Returns a dict with the
+    same aggregates as build_aggregates() (the cube is merged chunk by chunk)
+    plus "rows" (total row count) and "sample" (up to SAMPLE_ROWS_PER_STATUS
+    random rows per Instrument Status, fewer if that would not fit in a
+    quarter of the memory cap).
+    """
+    source.seek(0, os.SEEK_END)
+    total_bytes = max(source.tell(), 1)
+    source.seek(0)
+
+    header = pd.read_csv(source, nrows=0).columns
+    source.seek(0)
+    usecols = [column for column in AGGREGATE_COLUMNS if column in header]
+    row_bytes = _row_bytes(source)
+    # Rows per chunk so that parsing one chunk stays within the rest of the memory cap
+    chunk_budget = memory_cap_mb * 1024 * 1024 * (1 - _SAMPLE_SHARE)
+    chunksize = max(int(chunk_budget / (row_bytes * _PARSE_FACTOR)), 1000)
+
+    rng = np.random.default_rng(seed)
+    cube = None
+    sample = None
+    rows = 0
+
+    for chunk in pd.read_csv(source, usecols=usecols, chunksize=chunksize):
+        chunk = apply_bond_schema(chunk)
+        rows += len(chunk)
+        partial = AggregateCube.build(chunk)
+        # Fold the running cube into this chunk's, so only one set of cells is held at a time
+        cube = partial if cube is None else AggregateCube.merge([cube, partial])
+
+        if "Instrument Status" in chunk.columns:
+            # Keeping the rows with the smallest random keys is a uniform sample without replacement
+            keyed = chunk.astype({"Instrument Status": object}).assign(_key=rng.random(len(chunk)))
+            merged = keyed if sample is None else pd.concat([sample, keyed], ignore_index=True)
+            merged = merged.sort_values("_key")
+            sample = merged.groupby("Instrument Status", sort=False).head(_sample_quota(merged, row_bytes, memory_cap_mb))
+
+        if progress is not None:
+            progress(min(source.tell() / total_bytes, 1.0))
+
+    if cube is None:
+        cube = AggregateCube.build(pd.DataFrame(columns=usecols))
+    if sample is None:
+        sample = pd.DataFrame(columns=usecols)
+    sample = apply_bond_schema(sample.drop(columns="_key", errors="ignore").reset_index(drop=True))
+    return dict(aggregates_from_cube(cube), rows=rows, sample=sample)
+
+
+def load_upload_aggregates(file, memory_cap_mb=CSV_MEMORY_CAP_MB, progress=None):
+    """
+    aggregate_csv_chunked() for an uploaded file, cached in the upload cache by
+    content hash so reruns and repeat uploads do not rescan the file.
+    """
+    key = (upload_digest(file), "chunked", memory_cap_mb)
+    result = upload_cache.get(key)
+    if result is None:
+        result = aggregate_csv_chunked(io.BytesIO(file.getvalue()), memory_cap_mb, progress)
+        upload_cache.put(key, result, size=_nbytes(result))
+    return result
+
+
+# -------------------------------------------
+# PER-DATASET DERIVED VALUES
+# -------------------------------------------
+def _nbytes(value):
+    """Rough in-memory size of a derived value, for the upload cache's budget."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if callable(getattr(value, "memory_usage", None)):
+        # AggregateCube, CashFlows, ...
+        return value.memory_usage()
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return 64
+
+
+def dataset_derived(dataset_key, name, build, df):
+    """
+    build(df) for a dataset version identified by `dataset_key` (an upload's
+    content hash, the store's file hash, ...), computed once and kept in the
+    upload cache. Shared default datasets use BondDataset.derived instead.
+    """
+    key = (dataset_key, "derived", name)
+    value = upload_cache.get(key)
+    if value is None:
+        value = build(df)
+        upload_cache.put(key, value, size=_nbytes(value))
+    return value
@@ -0,0 +1,369 @@
+import numpy as np
+import pandas as pd
+
+from bond_daycount import day_count_codes, year_fractions
+
+
+# -------------------------------------------
+# COUPON CASH-FLOW SCHEDULES
+# -------------------------------------------
+# Projected coupon and redemption cash flows for every bond at once, as flat
+# arrays (bond row, pay date, amount, kind) built without a per-bond loop:
+# each bond's coupon count is computed up front, the (bond, period) pairs are
+# expanded with np.repeat, and dates and amounts are computed on the expansion.
+#
+# Coupon dates run from the First Coupon Date in steps of the coupon period,
+# keeping its day of month. A month-end anchor such as 30 June rolls to month
+# ends (31 December) only for bonds whose listed coupon dates do so or, when
+# they do not tell, whose maturity is a month end; otherwise the 30th is kept.
+# The last coupon
+# is paid at maturity (Pricing Redemption Date), so an off-cycle maturity gives
+# a short final period. Dates are not adjusted for business days. Coupons
+# accrue under the bond's Day count convention; bonds without one pay
+# rate / frequency per regular period, pro rata by days for broken ones.
+# Coupons use the current Coupon Rate for every period, so for floating-rate
+# notes they project the last fixing forward.
+FREQUENCY_MONTHS = {"Monthly": 1, "Quarterly": 3, "Semi Annually": 6, "Annually": 12}
+AT_MATURITY = "At Maturity"
+
+COUPON = 0
+REDEMPTION = 1
+KIND_LABELS = {COUPON: "Coupon", REDEMPTION: "Redemption"}
+
+# Listed (coupon date, books close date) pairs; the listed dates override the
+# Books Closed Period rule for the coupons they match
+LISTED_COUPON_COLUMNS = [("First Coupon Date", "First Books Close Date"), ("Coupon Dates", "Books Close Dates")] + [
+    (f"Coupon Dates.{k}", f"Books Close Dates.{k}") for k in range(1, 10)
+]
+
+CASH_FLOW_COLUMNS = ["Coupon Frequency", "Coupon Rate", "Day count convention", "Issue Date", "First Accural Date",
+                     "First Coupon Date", "Pricing Redemption Date", "Nominal Amount", "Books Closed Period"] + [
+    column for pair in LISTED_COUPON_COLUMNS[1:] for column in pair
+] + ["First Books Close Date"]
+
+# (bond, date) pairs are searched as one sorted int64 key: bond * _KEY_DAYS + days offset
+_KEY_DAYS = 1 << 20
+
+
+def date_array(df, column):
+    """A date column as datetime64[D] (all NaT when the column is missing)."""
+    if column not in df.columns:
+        return np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+    return df[column].to_numpy(dtype="datetime64[D]")
+
+
+def number_array(df, column):
+    """A numeric column as float64 (all NaN when the column is missing)."""
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _keys(bond, dates):
+    return bond.astype("int64") * _KEY_DAYS + dates.astype("int64") + _KEY_DAYS // 2
+
+
+def _bond_columns(df, rows, columns):
+    return df.iloc[rows][[column for column in columns if column in df.columns]].reset_index(drop=True)
+
+
+def is_month_end(dates):
+    """True where a datetime64[D] date is the last day of its month (False for NaT)."""
+    return (dates + 1).astype("datetime64[M]") > dates.astype("datetime64[M]")
+
+
+def add_months(dates, months, end_of_month=True):
+    """
+    Shift datetime64[D] dates by whole months, clipping the day to the target
+    month's length. Where `end_of_month` is true (an array or a flag), dates on
+    the last day of a month stay on the last day.
+    """
+    month = dates.astype("datetime64[M]")
+    day = (dates - month.astype("datetime64[D]")).astype("int64")
+    target = month + np.asarray(months).astype("int64")
+    target_length = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype("int64")
+    day = np.where(is_month_end(dates) & end_of_month, target_length - 1, np.minimum(day, target_length - 1))
+    return target.astype("datetime64[D]") + day
+
+
+class CashFlows:
+    """
+    Flat cash-flow arrays, one entry per payment, ordered by bond then date:
+    `bond` (row position in the source frame), `date` (datetime64[D]),
+    `amount` (rand), `kind` (COUPON or REDEMPTION) and, for coupons, the
+    accrual period `start`, the `books_close` date and the accrued year
+    `fraction` the coupon rate is paid over (NaT/NaN for redemptions).
+    `day_count` holds each source row's day-count code.
+    """
+
+    def __init__(self, bond, date, amount, kind, start, books_close, fraction, day_count):
+        self.bond = bond
+        self.date = date
+        self.amount = amount
+        self.kind = kind
+        self.start = start
+        self.books_close = books_close
+        self.fraction = fraction
+        self.day_count = day_count
+        coupons = np.flatnonzero(kind == COUPON)
+        self._coupons = coupons
+        self._coupon_keys = _keys(bond[coupons], date[coupons])
+
+    def __len__(self):
+        return len(self.bond)
+
+    def memory_usage(self):
+        return sum(array.nbytes for array in (self.bond, self.date, self.amount, self.kind, self.start,
+                                               self.books_close, self.fraction, self.day_count, self._coupon_keys))
+
+    def with_amounts(self, amount):
+        """The same schedule paying `amount` instead."""
+        return CashFlows(self.bond, self.date, amount, self.kind, self.start, self.books_close, self.fraction,
+                         self.day_count)
+
+    def of_bond(self, row, since=None):
+        """Positions of one bond's payments (from `since` on), in date order; flows are grouped by bond."""
+        positions = np.arange(*np.searchsorted(self.bond, [row, row + 1]))
+        if since is not None:
+            positions = positions[self.date[positions] >= np.datetime64(since, "D")]
+        return positions
+
+    def between(self, start, end):
+        """Boolean mask of payments dated start..end (inclusive)."""
+        return (self.date >= np.datetime64(start, "D")) & (self.date <= np.datetime64(end, "D"))
+
+    def by_month(self, start, end):
+        """Total coupons and redemptions paid per calendar month between start and end."""
+        mask = self.between(start, end)
+        frame = pd.DataFrame({
+            "Month": self.date[mask].astype("datetime64[M]"),
+            "Kind": pd.Categorical.from_codes(self.kind[mask], list(KIND_LABELS.values())),
+            "Amount": self.amount[mask],
+        })
+        return frame.pivot_table(index="Month", columns="Kind", values="Amount", aggfunc="sum",
+                                 fill_value=0.0, observed=False)
+
+    def frame(self, df, columns, mask=None, positions=None):
+        """
+        The payments (optionally only those in boolean `mask`, or at flow
+        `positions` as of_bond returns) as a table, with `columns` of each
+        payment's bond.
+        """
+        if positions is not None:
+            index = np.asarray(positions)
+        else:
+            index = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        table = _bond_columns(df, self.bond[index], columns)
+        table["Pay Date"] = self.date[index].astype("datetime64[ns]")
+        table["Type"] = np.array(list(KIND_LABELS.values()), dtype=object)[self.kind[index]]
+        table["Amount"] = self.amount[index]
+        nominal = number_array(df, "Nominal Amount")[self.bond[index]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table["Rate"] = np.where(self.kind[index] == COUPON, self.amount[index] / (nominal * self.fraction[index])
+                                     * 100.0, np.nan)
+        return table
+
+    def current_coupons(self, settlement, bonds=None):
+        """
+        Position (into the flow arrays) of the coupon each bond is accruing
+        towards on `settlement`: the first coupon paid after it whose period
+        has started. `settlement` is one date, or one date per entry of
+        `bonds` (default: every bond with coupons). Returns (bond rows, flow
+        positions, settlement dates) for the bonds that have one.
+        """
+        bonds = np.unique(self.bond[self._coupons]) if bonds is None else np.asarray(bonds)
+        days = np.broadcast_to(np.asarray(settlement, dtype="datetime64[D]"), bonds.shape)
+        found = np.searchsorted(self._coupon_keys, _keys(bonds, days), side="right")
+        inside = found < len(self._coupons)
+        bonds, days, found = bonds[inside], days[inside], self._coupons[found[inside]]
+        current = (self.bond[found] == bonds) & (self.start[found] <= days)
+        return bonds[current], found[current], days[current]
+
+    def accrued(self, settlement, bonds=None):
+        """
+        Accrued interest (rand) of the bonds in a coupon period on
+        `settlement`, as (bond rows, coupon positions, settlement dates,
+        accrued, ex-coupon flags); arguments as for current_coupons.
+        """
+        bonds, flows, days = self.current_coupons(settlement, bonds)
+        start, pay = self.start[flows], self.date[flows]
+        codes = np.where(self.day_count[bonds] < 0, 0, self.day_count[bonds])
+        accrued_share = np.nan_to_num(year_fractions(start, days, codes) / year_fractions(start, pay, codes))
+        ex_coupon = ~np.isnat(self.books_close[flows]) & (days > self.books_close[flows])
+        amount = self.amount[flows]
+        accrued = np.where(ex_coupon, amount * (accrued_share - 1.0), amount * accrued_share)
+        return bonds, flows, days, accrued, ex_coupon
+
+    def accrued_interest(self, settlement, bonds=None):
+        """
+        Accrued interest of every bond (or of the `bonds` row positions) in a
+        coupon period on `settlement`, indexed by row position. Interest accrues from the period start under the bond's
+        day-count convention (actual days without one). After the books close
+        date the bond trades ex coupon and the accrued interest is negative: the
+        seller still receives the coupon, so the buyer is owed the interest from
+        settlement to the pay date.
+        """
+        day = np.datetime64(settlement, "D")
+        bonds, flows, _, accrued, ex_coupon = self.accrued(day, bonds)
+        start, pay, amount = self.start[flows], self.date[flows], self.amount[flows]
+        return pd.DataFrame({
+            "Previous Coupon": start.astype("datetime64[ns]"),
+            "Next Coupon": pay.astype("datetime64[ns]"),
+            "Books Close": self.books_close[flows].astype("datetime64[ns]"),
+            "Ex Coupon": ex_coupon,
+            "Accrued Days": np.where(ex_coupon, (day - pay).astype("int64"), (day - start).astype("int64")),
+            "Coupon Amount": amount,
+            "Accrued Interest": accrued,
+        }, index=pd.Index(bonds, name="Row"))
+
+    def accrued_frame(self, df, columns, settlement, statuses=None):
+        """
+        accrued_interest with `columns` of each bond, plus accrued interest per
+        100 nominal. Only bonds whose Instrument Status is in `statuses` are
+        included (every bond when None or without a status column).
+        """
+        rows = None
+        if statuses is not None and "Instrument Status" in df.columns:
+            rows = np.flatnonzero(df["Instrument Status"].isin(statuses).to_numpy())
+        accrued = self.accrued_interest(settlement, rows)
+        table = pd.concat([_bond_columns(df, accrued.index, columns), accrued.reset_index(drop=True)], axis=1)
+        nominal = number_array(df, "Nominal Amount")[accrued.index]
+        table["Accrued per 100"] = np.where(nominal > 0, accrued["Accrued Interest"].to_numpy() / nominal * 100.0,
+                                            np.nan)
+        return table
+
+
+def build_cash_flows(df):
+    """Project the coupon and redemption cash flows of every bond in `df`."""
+    maturity = date_array(df, "Pricing Redemption Date")
+    nominal = number_array(df, "Nominal Amount")
+    rate = number_array(df, "Coupon Rate") / 100.0
+    accrual_start = date_array(df, "First Accural Date")
+    accrual_start = np.where(np.isnat(accrual_start), date_array(df, "Issue Date"), accrual_start)
+    first_coupon = date_array(df, "First Coupon Date")
+    first_coupon = np.where(np.isnat(first_coupon), accrual_start, first_coupon)
+    frequency = (df["Coupon Frequency"].astype(object) if "Coupon Frequency" in df.columns
+                 else pd.Series(np.nan, index=df.index, dtype=object))
+    months = frequency.map(FREQUENCY_MONTHS).to_numpy(dtype="float64", na_value=np.nan)
+    day_count = (day_count_codes(df["Day count convention"]) if "Day count convention" in df.columns
+                 else np.full(len(df), -1, dtype="int8"))
+
+    month_end = _month_end_rule(df, first_coupon, maturity)
+
+    valid = ~np.isnat(maturity) & (nominal > 0)
+    paying = valid & (rate > 0)
+    periodic = paying & ~np.isnan(months) & ~np.isnat(first_coupon) & (first_coupon <= maturity)
+    at_maturity = paying & (frequency == AT_MATURITY).to_numpy() & ~np.isnat(accrual_start)
+
+    # Regular coupons: one per period from the first coupon date while strictly before maturity
+    step = np.where(periodic, months, 1).astype("int64")
+    span = np.where(periodic,
+                    (maturity.astype("datetime64[M]") - first_coupon.astype("datetime64[M]")).astype("int64"), -1)
+    counts = np.where(periodic, span // step + 1, 0)
+    bond = np.repeat(np.arange(len(df)), counts)
+    k = np.arange(len(bond)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pay = add_months(first_coupon[bond], k * step[bond], month_end[bond])
+    keep = pay < maturity[bond]
+    bond, k, pay = bond[keep], k[keep], pay[keep]
+    start = add_months(first_coupon[bond], (k - 1) * step[bond], month_end[bond])
+    first = k == 0
+    start[first] = np.where(np.isnat(accrual_start[bond[first]]), start[first], accrual_start[bond[first]])
+
+    # The final coupon is paid at maturity, over what is left of its period
+    final = np.flatnonzero(periodic)
+    regular = np.bincount(bond, minlength=len(df))[final]
+    last_pay = add_months(first_coupon[final], (regular - 1) * step[final], month_end[final])
+    final_start = np.where(regular > 0, last_pay, accrual_start[final])
+    final_start = np.where(np.isnat(final_start), add_months(maturity[final], -step[final]), final_start)
+
+    bond = np.concatenate([bond, final])
+    pay = np.concatenate([pay, maturity[final]])
+    start = np.concatenate([start, final_start])
+    # Broken first periods are measured against the regular period ending on their pay date,
+    # stub final periods against the regular period starting on their start date; both pay pro rata by days
+    opening = np.concatenate([first, regular == 0])
+    closing = np.concatenate([np.zeros(len(first), dtype=bool), regular > 0])
+    regular_days = np.where(opening, (pay - add_months(pay, -step[bond], month_end[bond])).astype("int64"),
+                            (add_months(start, step[bond], month_end[bond]) - start).astype("int64"))
+    scale = np.where(opening | closing, (pay - start).astype("int64") / np.maximum(regular_days, 1), 1.0)
+    fraction = year_fractions(start, pay, day_count[bond])
+    fraction = np.where(np.isnan(fraction), step[bond] / 12.0 * scale, fraction)
+    amount = nominal[bond] * rate[bond] * fraction
+
+    # Interest paid once at maturity accrues over the whole life (Actual/365 without a convention)
+    single = np.flatnonzero(at_maturity)
+    single_fraction = year_fractions(accrual_start[single], maturity[single], day_count[single])
+    single_fraction = np.where(np.isnan(single_fraction),
+                               (maturity[single] - accrual_start[single]).astype("int64") / 365.0, single_fraction)
+    single_amount = nominal[single] * rate[single] * single_fraction
+
+    redeemed = np.flatnonzero(valid)
+    bonds = np.concatenate([bond, single, redeemed])
+    dates = np.concatenate([pay, maturity[single], maturity[redeemed]])
+    amounts = np.concatenate([amount, single_amount, nominal[redeemed]])
+    fractions = np.concatenate([fraction, single_fraction, np.full(len(redeemed), np.nan)])
+    kinds = np.concatenate([np.full(len(bond) + len(single), COUPON, dtype="int8"),
+                            np.full(len(redeemed), REDEMPTION, dtype="int8")])
+    no_date = np.full(len(redeemed), np.datetime64("NaT"), dtype="datetime64[D]")
+    starts = np.concatenate([start, accrual_start[single], no_date])
+
+    # Books close: the listed date for a listed coupon, else Books Closed Period calendar days before paying
+    closed_days = number_array(df, "Books Closed Period")
+    coupon_bonds = np.concatenate([bond, single])
+    coupon_dates = np.concatenate([pay, maturity[single]])
+    offset = closed_days[coupon_bonds]
+    books_close = np.where(np.isnan(offset), np.datetime64("NaT"),
+                           coupon_dates - np.nan_to_num(offset).astype("int64").astype("timedelta64[D]"))
+    listed_rows, listed_dates, listed_close = listed_coupons(df)
+    listed_keys = _keys(listed_rows, listed_dates)
+    order = np.argsort(listed_keys, kind="stable")
+    listed_keys, listed_close = listed_keys[order], listed_close[order]
+    found = np.minimum(np.searchsorted(listed_keys, _keys(coupon_bonds, coupon_dates)), max(len(listed_keys) - 1, 0))
+    if len(listed_keys):
+        matched = listed_keys[found] == _keys(coupon_bonds, coupon_dates)
+        books_close = np.where(matched, listed_close[found], books_close)
+    books_closes = np.concatenate([books_close.astype("datetime64[D]"), no_date])
+
+    order = np.lexsort((kinds, dates, bonds))
+    return CashFlows(bonds[order], dates[order], amounts[order], kinds[order], starts[order], books_closes[order],
+                     fractions[order], day_count)
+
+
+def _month_end_rule(df, anchor, maturity):
+    """
+    Per bond, whether a month-end anchor rolls to month ends: as its listed
+    coupon dates in longer months show, else when maturity is a month end.
+    """
+    def day_of_month(dates):
+        return (dates - dates.astype("datetime64[M]").astype("datetime64[D]")).astype("int64")
+
+    anchor_day = day_of_month(anchor)
+    rolled = np.zeros(len(df), dtype=bool)
+    kept = np.zeros(len(df), dtype=bool)
+    for coupon_column, _ in LISTED_COUPON_COLUMNS[1:]:
+        listed = date_array(df, coupon_column)
+        month = listed.astype("datetime64[M]")
+        last_day = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype("int64") - 1
+        # Only months longer than the anchor's day tell the two rules apart
+        longer = ~np.isnat(listed) & (last_day > anchor_day)
+        rolled |= longer & is_month_end(listed)
+        kept |= longer & (day_of_month(listed) == anchor_day)
+    return np.where(rolled != kept, rolled, is_month_end(maturity))
+
+
+def listed_coupons(df):
+    """
+    (row, coupon date, books close date) for every listed pair with both
+    dates, each (row, coupon date) once (the first coupon is often listed
+    again under Coupon Dates).
+    """
+    rows, coupons, closes = [], [], []
+    for coupon_column, close_column in LISTED_COUPON_COLUMNS:
+        coupon, close = date_array(df, coupon_column), date_array(df, close_column)
+        listed = np.flatnonzero(~np.isnat(coupon) & ~np.isnat(close))
+        rows.append(listed)
+        coupons.append(coupon[listed])
+        closes.append(close[listed])
+    rows, coupons, closes = np.concatenate(rows), np.concatenate(coupons), np.concatenate(closes)
+    _, first = np.unique(_keys(rows, coupons), return_index=True)
+    return rows[first], coupons[first], closes[first]
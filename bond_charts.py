@@ -0,0 +1,220 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from bond_data import FrameCache
+
+
+# -------------------------------------------
+# BROWSER-RENDERED CHARTS (VEGA-LITE)
+# -------------------------------------------
+# Charts for the bond tabs built from already aggregated data. Only the few
+# rows behind each chart (quartiles, counts, top-N totals) are sent to the
+# browser, which draws them, so server work per interaction does not depend on
+# the dataset size or on how many users are drawing charts.
+CHART_HEIGHT = 360
+
+
+def box_chart(box_stats, title):
+    """Boxplot from precomputed statistics (the dicts Axes.bxp takes), outliers included."""
+    stats = pd.DataFrame(
+        [{key: stat[key] for key in ("label", "q1", "med", "q3", "whislo", "whishi")} for stat in box_stats]
+    )
+    base = alt.Chart(stats).encode(
+        x=alt.X("label:N", title="Instrument Status", sort=None, axis=alt.Axis(labelAngle=-45))
+    )
+    whiskers = base.mark_rule().encode(
+        y=alt.Y("whislo:Q", title="Nominal Amount"),
+        y2="whishi:Q",
+    )
+    boxes = base.mark_bar(size=28).encode(
+        y="q1:Q",
+        y2="q3:Q",
+        color=alt.Color("label:N", legend=None, scale=alt.Scale(scheme="set2")),
+        tooltip=[
+            alt.Tooltip("label:N", title="Instrument Status"),
+            alt.Tooltip("whislo:Q", title="Lower whisker", format=",.0f"),
+            alt.Tooltip("q1:Q", title="Q1", format=",.0f"),
+            alt.Tooltip("med:Q", title="Median", format=",.0f"),
+            alt.Tooltip("q3:Q", title="Q3", format=",.0f"),
+            alt.Tooltip("whishi:Q", title="Upper whisker", format=",.0f"),
+        ],
+    )
+    medians = base.mark_tick(color="black", size=28).encode(y="med:Q")
+    fliers = pd.DataFrame(
+        [{"label": stat["label"], "value": value} for stat in box_stats for value in stat["fliers"]],
+        columns=["label", "value"]
+    )
+    outliers = alt.Chart(fliers).mark_point(size=12, color="gray").encode(
+        x=alt.X("label:N", sort=None),
+        y="value:Q",
+        tooltip=[alt.Tooltip("label:N", title="Instrument Status"), alt.Tooltip("value:Q", format=",.0f")],
+    )
+    return (whiskers + boxes + medians + outliers).properties(title=title, height=CHART_HEIGHT)
+
+
+def status_count_chart(status_counts, title):
+    """Horizontal bars of issue counts per Instrument Status."""
+    data = status_counts.rename_axis("Instrument Status").reset_index(name="Count")
+    return alt.Chart(data).mark_bar().encode(
+        x=alt.X("Count:Q"),
+        y=alt.Y("Instrument Status:N", sort=None),
+        color=alt.Color("Count:Q", legend=None, scale=alt.Scale(scheme="redblue", reverse=True)),
+        tooltip=["Instrument Status:N", "Count:Q"],
+    ).properties(title=title, height=CHART_HEIGHT)
+
+
+def issuer_chart(issuer_totals, title):
+    """Vertical bars of total Nominal Amount for the given issuers, in their order."""
+    data = issuer_totals.rename_axis("Issuer Name").reset_index(name="Total Nominal Amount")
+    return alt.Chart(data).mark_bar(color="skyblue").encode(
+        x=alt.X("Issuer Name:N", sort=None, axis=alt.Axis(labelAngle=-60, labelLimit=200)),
+        y=alt.Y("Total Nominal Amount:Q"),
+        tooltip=["Issuer Name:N", alt.Tooltip("Total Nominal Amount:Q", format=",.0f")],
+    ).properties(title=title, height=CHART_HEIGHT)
+
+
+def cash_flow_chart(monthly, title):
+    """Stacked monthly bars of coupon and redemption totals (columns of `monthly`, indexed by month)."""
+    data = monthly.rename_axis("Month").reset_index().melt("Month", var_name="Type", value_name="Amount")
+    return alt.Chart(data).mark_bar().encode(
+        x=alt.X("yearmonth(Month):T", title="Pay month"),
+        y=alt.Y("sum(Amount):Q", title="Amount"),
+        color=alt.Color("Type:N", scale=alt.Scale(scheme="tableau10")),
+        tooltip=[alt.Tooltip("yearmonth(Month):T", title="Month"), "Type:N",
+                 alt.Tooltip("sum(Amount):Q", title="Amount", format=",.0f")],
+    ).properties(title=title, height=CHART_HEIGHT)
+
+
+def dv01_chart(dv01, title):
+    """Horizontal bars of DV01 per group, in the order given (the index name labels the axis)."""
+    group = dv01.index.name or "Group"
+    data = dv01.rename_axis(group).reset_index(name="DV01")
+    data[group] = data[group].astype(str)
+    return alt.Chart(data).mark_bar(color="indianred").encode(
+        x=alt.X("DV01:Q", title="DV01 (rand per basis point)"),
+        y=alt.Y(f"{group}:N", sort=None, axis=alt.Axis(labelLimit=250)),
+        tooltip=[f"{group}:N", alt.Tooltip("DV01:Q", format=",.0f")],
+    ).properties(title=title, height=CHART_HEIGHT)
+
+
+# -------------------------------------------
+# SERVER-RENDERED CHARTS (MATPLOTLIB)
+# -------------------------------------------
+# PNGs are rendered once per (dataset key, chart, parameters) and kept in a
+# process-wide LRU bounded by their byte size, so repeated views, reruns and
+# other sessions on the same data skip matplotlib entirely.
+#
+# Rendering uses explicit Agg Figure objects and never touches pyplot's global
+# state (current figure/axes, figure registry), so figures from concurrent
+# sessions cannot interfere. Renders run on a bounded worker pool; sessions
+# asking for the same chart at the same time share one render.
+FIGURE_CACHE_MAX_BYTES = int(os.environ.get("BOND_FIGURE_CACHE_MB", "64")) * 1024 * 1024
+RENDER_WORKERS = int(os.environ.get("BOND_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+FIGURE_SIZE = (8, 5)
+FIGURE_DPI = 100
+
+figure_cache = FrameCache(FIGURE_CACHE_MAX_BYTES)
+_render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="bond-chart")
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _render(draw):
+    fig = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+    FigureCanvasAgg(fig)
+    draw(fig.subplots())
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def render_png(draw):
+    """Run draw(ax) on a fresh Agg figure in the render pool and return it as PNG bytes."""
+    return _render_pool.submit(_render, draw).result()
+
+
+def cached_png(dataset_key, chart, params, draw):
+    """PNG for a chart of a dataset version, rendering it with draw(ax) only on a cache miss."""
+    key = (dataset_key, chart, params)
+    png = figure_cache.get(key)
+    if png is not None:
+        return png
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = _in_flight[key] = _render_pool.submit(_render, draw)
+    try:
+        png = future.result()
+    finally:
+        with _in_flight_lock:
+            if _in_flight.get(key) is future:
+                del _in_flight[key]
+    figure_cache.put(key, png, size=len(png))
+    return png
+
+
+def draw_box(ax, box_stats, title):
+    boxes = ax.bxp(box_stats, showfliers=True, patch_artist=True, flierprops={"markersize": 3, "alpha": 0.6})
+    for patch, color in zip(boxes["boxes"], sns.color_palette("Set2", len(box_stats))):
+        patch.set_facecolor(color)
+    ax.set_title(title)
+    ax.set_xlabel("Instrument Status")
+    ax.set_ylabel("Nominal Amount")
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+
+
+def draw_status_counts(ax, status_counts, title):
+    positions = range(len(status_counts))
+    ax.barh(positions, status_counts.to_numpy(), color=sns.color_palette("coolwarm", len(status_counts)))
+    ax.set_yticks(positions, [str(status) for status in status_counts.index])
+    ax.invert_yaxis()
+    ax.set_title(title)
+    ax.set_ylabel("Instrument Status")
+    ax.set_xlabel("Count")
+
+
+def draw_issuers(ax, issuer_totals, title):
+    positions = range(len(issuer_totals))
+    ax.bar(positions, issuer_totals.to_numpy(), color="skyblue")
+    ax.set_xticks(positions, [str(issuer) for issuer in issuer_totals.index], rotation=60, ha="right")
+    ax.set_title(title)
+    ax.set_xlabel("Issuer Name")
+    ax.set_ylabel("Total Nominal Amount")
+
+
+def draw_cash_flows(ax, monthly, title):
+    positions = np.arange(len(monthly))
+    bottom = np.zeros(len(monthly))
+    for kind, color in zip(monthly.columns, sns.color_palette("tab10", len(monthly.columns))):
+        ax.bar(positions, monthly[kind].to_numpy(), bottom=bottom, color=color, label=str(kind))
+        bottom += monthly[kind].to_numpy()
+    step = max(len(monthly) // 12, 1)
+    ax.set_xticks(positions[::step], [month.strftime("%b %Y") for month in monthly.index[::step]], rotation=45,
+                  ha="right")
+    ax.legend()
+    ax.set_title(title)
+    ax.set_xlabel("Pay month")
+    ax.set_ylabel("Amount")
+
+
+def draw_dv01(ax, dv01, title):
+    positions = range(len(dv01))
+    ax.barh(positions, dv01.to_numpy(), color="indianred")
+    ax.set_yticks(positions, [str(group) for group in dv01.index])
+    ax.invert_yaxis()
+    ax.set_title(title)
+    ax.set_ylabel(dv01.index.name or "")
+    ax.set_xlabel("DV01 (rand per basis point)")
@@ -0,0 +1,836 @@
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import iterparse
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# -------------------------------------------
+# STREAMING XLSX READER
+# -------------------------------------------
+_SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Element names as reported by expat with "}" as the namespace separator
+_C = _SHEET_NS[1:] + "c"
+_V = _SHEET_NS[1:] + "v"
+_T = _SHEET_NS[1:] + "t"
+_ROW = _SHEET_NS[1:] + "row"
+
+# Built-in number formats that Excel renders as dates/times
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+
+
+def _first_sheet_path(archive):
+    """Resolve the archive path of the first worksheet, defaulting to sheet1.xml."""
+    try:
+        rel_id = None
+        for _, elem in iterparse(archive.open("xl/workbook.xml")):
+            if elem.tag == _SHEET_NS + "sheet":
+                rel_id = elem.get(_REL_NS + "id")
+                break
+        for _, elem in iterparse(archive.open("xl/_rels/workbook.xml.rels")):
+            if elem.tag == _PKG_REL_NS + "Relationship" and elem.get("Id") == rel_id:
+                target = elem.get("Target")
+                if target.startswith("/"):
+                    return target.lstrip("/")
+                return posixpath.normpath(posixpath.join("xl", target))
+    except KeyError:
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _read_shared_strings(archive):
+    """Read sharedStrings.xml once into a list indexed by string id."""
+    strings = []
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return strings
+    for _, elem in iterparse(archive.open("xl/sharedStrings.xml")):
+        if elem.tag == _SHEET_NS + "si":
+            # Plain strings hold one <t>; rich text is split into runs. Phonetic hints are skipped.
+            text = elem.findtext(_SHEET_NS + "t")
+            if text is None:
+                text = "".join(run.findtext(_SHEET_NS + "t") or "" for run in elem.findall(_SHEET_NS + "r"))
+            strings.append(text)
+            elem.clear()
+    return strings
+
+
+def _read_date_styles(archive):
+    """Return the set of cell style indexes whose number format is a date."""
+    if "xl/styles.xml" not in archive.namelist():
+        return set()
+    custom_date_formats = set()
+    date_styles = set()
+    in_cell_xfs = False
+    xf_index = 0
+    for event, elem in iterparse(archive.open("xl/styles.xml"), events=("start", "end")):
+        if event == "start":
+            if elem.tag == _SHEET_NS + "cellXfs":
+                in_cell_xfs = True
+            continue
+        if elem.tag == _SHEET_NS + "numFmt":
+            # Drop quoted literals, escapes and [colour]/[locale] sections before looking for date tokens
+            code = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', "", (elem.get("formatCode") or "").lower())
+            if re.search(r"[dmyhs]", code) and not re.search(r"[#0?]", code):
+                custom_date_formats.add(int(elem.get("numFmtId")))
+        elif elem.tag == _SHEET_NS + "xf" and in_cell_xfs:
+            fmt_id = int(elem.get("numFmtId", 0))
+            if fmt_id in _BUILTIN_DATE_FORMATS or fmt_id in custom_date_formats:
+                date_styles.add(xf_index)
+            xf_index += 1
+        elif elem.tag == _SHEET_NS + "cellXfs":
+            in_cell_xfs = False
+    return date_styles
+
+
+def _date_epoch(archive):
+    """Day zero for serial dates: 1899-12-30, or 1904-01-01 for Mac-origin workbooks."""
+    for _, elem in iterparse(archive.open("xl/workbook.xml")):
+        if elem.tag == _SHEET_NS + "workbookPr":
+            if elem.get("date1904") in ("1", "true"):
+                return datetime(1904, 1, 1)
+            break
+    return datetime(1899, 12, 30)
+
+
+def _column_index(ref):
+    """Convert the letters of a cell reference (e.g. 'BE12') to a zero-based column index."""
+    index = 0
+    for ch in ref:
+        if ch.isdigit():
+            break
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _dedupe_headers(headers):
+    """Rename repeated headers the way pandas does ('Coupon Dates', 'Coupon Dates.1', ...)."""
+    counts = {}
+    result = []
+    for position, name in enumerate(headers):
+        name = f"Unnamed: {position}" if name in (None, "") else str(name)
+        if name in counts:
+            counts[name] += 1
+            name = f"{name}.{counts[name]}"
+        counts.setdefault(name, 0)
+        result.append(name)
+    return result
+
+
+class _StopReading(Exception):
+    pass
+
+
+class _SheetHandler:
+    """SAX handlers for a worksheet: keeps only the wanted columns, row by row."""
+
+    def __init__(self, shared_strings, date_styles, epoch, columns, nrows):
+        self.shared_strings = shared_strings
+        self.date_styles = date_styles
+        self.epoch = epoch
+        self.columns = columns
+        self.nrows = nrows
+
+        self.wanted = None  # sheet column index -> output slot, decided by the header row
+        self.names = []
+        self.values = []
+        self.row_count = 0
+        self.next_row = 1
+        self.row_number = 1
+        self.next_col = 0
+        self.column_of = {}
+        self.cells = {}
+        self.cell_col = None
+        self.cell_type = None
+        self.cell_style = None
+        self.text = []
+        self.capture = False
+
+    def start(self, name, attrs):
+        if name == _C:
+            ref = attrs.get("r")
+            if ref:
+                letters = ref.rstrip("0123456789")
+                col = self.column_of.get(letters)
+                if col is None:
+                    col = self.column_of[letters] = _column_index(letters)
+            else:
+                col = self.next_col
+            self.next_col = col + 1
+            if self.wanted is None or col in self.wanted:
+                self.cell_col = col
+                self.cell_type = attrs.get("t")
+                self.cell_style = attrs.get("s")
+                self.text = []
+            else:
+                self.cell_col = None
+        elif name == _V or name == _T:
+            self.capture = self.cell_col is not None
+        elif name == _ROW:
+            self.row_number = int(attrs.get("r") or self.next_row)
+            self.next_col = 0
+            self.cells = {}
+
+    def chars(self, data):
+        if self.capture:
+            self.text.append(data)
+
+    def end(self, name):
+        if name == _V or name == _T:
+            self.capture = False
+        elif name == _C:
+            if self.cell_col is not None and self.text:
+                value = self.convert("".join(self.text))
+                if value is not None:
+                    self.cells[self.cell_col] = value
+            self.cell_col = None
+        elif name == _ROW:
+            self.finish_row()
+
+    def convert(self, raw):
+        cell_type = self.cell_type
+        if cell_type == "s":
+            return self.shared_strings[int(raw)]
+        if cell_type in ("str", "inlineStr"):
+            return raw
+        if cell_type == "e":
+            return None
+        if cell_type == "b":
+            return raw == "1"
+        if cell_type == "d":
+            return pd.Timestamp(raw)
+        number = int(raw) if raw.lstrip("-").isdigit() else float(raw)
+        if self.cell_style is not None and int(self.cell_style) in self.date_styles:
+            return self.epoch + timedelta(days=number)
+        return number
+
+    def finish_row(self):
+        cells = self.cells
+        if self.wanted is None:
+            # Header row decides which sheet columns are kept for the rest of the file
+            width = max(cells) + 1 if cells else 0
+            headers = _dedupe_headers([cells.get(i) for i in range(width)])
+            order = list(self.columns) if self.columns is not None else headers
+            keep = sorted((i for i, name in enumerate(headers) if name in order),
+                          key=lambda i: order.index(headers[i]))
+            self.wanted = {col: slot for slot, col in enumerate(keep)}
+            self.names = [headers[i] for i in keep]
+            self.values = [[] for _ in keep]
+            self.next_row = self.row_number + 1
+            return
+
+        # Blank rows inside the table are kept as empty rows, as pandas does
+        while self.next_row < self.row_number:
+            self.append_row({})
+            self.next_row += 1
+        self.append_row(cells)
+        self.next_row = self.row_number + 1
+
+    def append_row(self, cells):
+        if self.nrows is not None and self.row_count >= self.nrows:
+            raise _StopReading()
+        for col, slot in self.wanted.items():
+            self.values[slot].append(cells.get(col))
+        self.row_count += 1
+
+
+def read_xlsx(source, columns=None, nrows=None):
+    """
+    Stream the first worksheet of an XLSX file into a DataFrame.
+
+    `source` is a path or a binary file object. Only the headers listed in
+    `columns` are materialised (all columns when None) and parsing stops after
+    `nrows` data rows. sharedStrings.xml is resolved once up front; the sheet
+    XML goes through an expat (SAX) parser, so it is never held in memory and
+    cells outside the projection are dropped as soon as they are seen.
+    """
+    with zipfile.ZipFile(source) as archive:
+        handler = _SheetHandler(_read_shared_strings(archive), _read_date_styles(archive),
+                                _date_epoch(archive), columns, nrows)
+        parser = expat.ParserCreate(namespace_separator="}")
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.chars
+        try:
+            with archive.open(_first_sheet_path(archive)) as sheet:
+                parser.ParseFile(sheet)
+        except _StopReading:
+            pass
+
+    return pd.DataFrame({name: pd.Series(column, dtype=None if column else object)
+                         for name, column in zip(handler.names, handler.values)},
+                        columns=handler.names)
+
+
+# -------------------------------------------
+# BOND SCHEMA
+# -------------------------------------------
+# Declared types for the 57 columns of the JSE bond extract. Repeated headers
+# ("Coupon Dates.1", "Books Close Dates.3", ...) take the type of their base name.
+# Date columns carry the format they are exported in.
+BOND_SCHEMA = {
+    "Issuer Name": "category",
+    "Alpha Code": "string",
+    "Issue Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "Maturity Date Year": "Int16",
+    "Instrument Status": "category",
+    "Issue Type": "category",
+    "ISIN": "string",
+    "Amount Authorised": "float",
+    "Nominal Amount": "float",
+    "CFI Code": "category",
+    "Issue Price Format": "category",
+    "Issue Price": "float",
+    "Pricing Class": "category",
+    "Pricing Method": "category",
+    "Commercial Paper Identifier": "category",
+    "Pricing Redemption Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "Coupon Frequency": "category",
+    "Customised Coupon": "category",
+    "Coupon Rate": "float",
+    "Basis Points": "float",
+    "Reference Rate": "category",
+    "Over/Under Indicator": "category",
+    "Linked / Reference Index": "category",
+    "Base CPI": "float",
+    "Business Day Convention": "category",
+    "Books Closed Period": "Int16",
+    "Programme Name": "category",
+    "Day count convention": "category",
+    "Sub Sector": "category",
+    "Broken First Coupon": "category",
+    "First Accural Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "First Coupon Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "First Books Close Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "Coupon Dates": ("datetime", "%d-%b-%Y"),
+    "Books Close Dates": ("datetime", "%d-%b-%Y"),
+    "Call Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "Split Maturity Date": ("datetime", "%Y/%m/%d %H:%M:%S"),
+    "Inward Listed": "category",
+    "MIC Code": "category",
+}
+
+# The extract writes "." for an empty field
+NULL_MARKERS = [".", ""]
+
+
+def schema_type(column):
+    """Declared type of a column, resolving pandas' '.N' suffix on repeated headers."""
+    if column in BOND_SCHEMA:
+        return BOND_SCHEMA[column]
+    return BOND_SCHEMA.get(re.sub(r"\.\d+$", "", str(column)))
+
+
+def _as_text(series):
+    """Strings with surrounding whitespace and null markers removed."""
+    text = series.astype("string").str.strip()
+    return text.mask(text.isin(NULL_MARKERS))
+
+
+def _to_datetime(series, fmt):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("datetime64[ns]")
+    text = _as_text(series)
+    parsed = pd.to_datetime(text, format=fmt, errors="coerce")
+    leftover = parsed.isna() & text.notna()
+    if leftover.any():
+        # Uploads exported by other tools may use another layout (e.g. ISO dates)
+        parsed[leftover] = pd.to_datetime(text[leftover], format="mixed", errors="coerce")
+    return parsed.astype("datetime64[ns]")
+
+
+def _to_number(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(_as_text(series), errors="coerce")
+
+
+def coerce_column(series, kind):
+    """Convert one column to its declared type; unparseable cells become missing."""
+    if isinstance(kind, tuple):
+        return _to_datetime(series, kind[1])
+    if kind == "float":
+        return _to_number(series).astype("float64")
+    if kind == "Int16":
+        return _to_number(series).round().astype("Int16")
+    if kind == "category":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        return _as_text(series).astype("category")
+    return _as_text(series)
+
+
+def apply_bond_schema(df):
+    """Return a copy of `df` with every column that appears in BOND_SCHEMA coerced to its type."""
+    typed = {}
+    for column in df.columns:
+        kind = schema_type(column)
+        typed[column] = df[column] if kind is None else coerce_column(df[column], kind)
+    return pd.DataFrame(typed, index=df.index, columns=df.columns)
+
+
+# -------------------------------------------
+# VALIDATION REPORT
+# -------------------------------------------
+# A cell is invalid when the source holds a value (not a null marker) that
+# coercion to its declared type turned into missing. The report is built once
+# per parse and kept with the dataset: next to the snapshot for local files,
+# in the upload cache for uploads.
+REJECTED_SAMPLE_ROWS = 500
+
+
+def _present(series):
+    """True where the raw column holds a value rather than a null marker."""
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        return _as_text(series).notna().to_numpy()
+    return series.notna().to_numpy()
+
+
+def validate_bonds(raw, typed):
+    """
+    Compare a parsed source frame with its typed version (apply_bond_schema(raw)).
+    Returns a dict with "rows", "invalid_counts" (cells per schema column that
+    failed coercion), "rejected_rows" (rows with at least one such cell) and
+    "rejected" (the first REJECTED_SAMPLE_ROWS of them as source text, with the
+    row number and the offending columns).
+    """
+    columns = [column for column in raw.columns if schema_type(column) is not None]
+    if columns:
+        invalid = np.column_stack([_present(raw[column]) & typed[column].isna().to_numpy() for column in columns])
+    else:
+        invalid = np.zeros((len(raw), 0), dtype=bool)
+    bad_rows = np.flatnonzero(invalid.any(axis=1))
+    sample = bad_rows[:REJECTED_SAMPLE_ROWS]
+
+    labels = np.array(columns, dtype=object)
+    rejected = raw.iloc[sample].astype("string").fillna("")
+    rejected.insert(0, "Invalid Columns", [", ".join(labels[invalid[row]]) for row in sample])
+    rejected.insert(0, "Row", sample + 1)
+    return {
+        "rows": len(raw),
+        "invalid_counts": pd.Series(invalid.sum(axis=0), index=pd.Index(columns, dtype=object), name="Invalid"),
+        "rejected_rows": len(bad_rows),
+        "rejected": rejected.reset_index(drop=True),
+    }
+
+
+def validation_path(target):
+    """Companion file of a snapshot holding its validation report."""
+    return target[:-len(".feather")] + ".validation.feather"
+
+
+def write_validation(report, target):
+    """Store a report as the rejected-rows sample, with the counts in the file's metadata."""
+    table = pa.Table.from_pandas(report["rejected"], preserve_index=False)
+    summary = {
+        "rows": report["rows"],
+        "rejected_rows": report["rejected_rows"],
+        "invalid_counts": {str(column): int(count) for column, count in report["invalid_counts"].items()},
+    }
+    table = table.replace_schema_metadata(dict(table.schema.metadata or {}, bond_validation=json.dumps(summary)))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_validation(target):
+    """Load a report written by write_validation(), or None if there is none."""
+    if not os.path.exists(target):
+        return None
+    table = feather.read_table(target)
+    summary = json.loads(table.schema.metadata[b"bond_validation"])
+    counts = summary["invalid_counts"]
+    return {
+        "rows": summary["rows"],
+        "invalid_counts": pd.Series(list(counts.values()), index=pd.Index(list(counts), dtype=object),
+                                    dtype="int64", name="Invalid"),
+        "rejected_rows": summary["rejected_rows"],
+        "rejected": table.to_pandas(),
+    }
+
+
+# -------------------------------------------
+# COLUMNAR SNAPSHOT CACHE
+# -------------------------------------------
+# Parsed workbooks are written next to the data as uncompressed Feather
+# (Arrow IPC) files. The directory is shared by every session and process,
+# so a workbook is only parsed once per content version.
+SNAPSHOT_DIR = os.path.join("data", ".cache")
+
+# Bump whenever what a snapshot holds changes (e.g. BOND_SCHEMA), so old files are not reused
+SNAPSHOT_VERSION = 3
+
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """Return the SHA-256 of a file, rehashing only when its mtime or size changes."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _fingerprint_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprints[memo_key] = fingerprint
+    return fingerprint
+
+
+def snapshot_path(path, fingerprint):
+    """Location of the columnar snapshot for a given source file version."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(SNAPSHOT_DIR, f"{stem}-{fingerprint[:16]}.v{SNAPSHOT_VERSION}.feather")
+
+
+def write_feather(df, target):
+    """Write an uncompressed (memory-mappable) Feather file atomically, via a temp file and rename."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        df.to_feather(tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_snapshot(df, target):
+    """Atomically write a snapshot and drop older versions (and their companions) of the same source."""
+    write_feather(df, target)
+
+    current = os.path.basename(target)[:-len(".feather")]
+    stem = current.rsplit("-", 1)[0]
+    same_source = re.compile(re.escape(stem) + r"-[0-9a-f]{16}(\.v\d+)?(\.validation)?\.feather$")
+    for name in os.listdir(os.path.dirname(target)):
+        stale = os.path.join(os.path.dirname(target), name)
+        if same_source.match(name) and not name.startswith(current + "."):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def read_source_file(source, name, columns=None, nrows=None):
+    """
+    Parse an XLSX or CSV path/file object, keeping only `columns` (all when None)
+    and at most `nrows` rows. Returns None for other formats.
+    """
+    if name.endswith(".xlsx"):
+        return read_xlsx(source, columns=columns, nrows=nrows)
+    elif name.endswith(".csv"):
+        usecols = None if columns is None else (lambda column: column in columns)
+        return pd.read_csv(source, usecols=usecols, nrows=nrows)
+    return None
+
+
+def read_snapshot(target, columns=None, nrows=None):
+    """Read a projection of a snapshot through a memory map; missing columns are skipped."""
+    table = pa.ipc.open_file(pa.memory_map(target)).read_all()
+    if columns is not None:
+        table = table.select([name for name in columns if name in table.column_names])
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    return table.to_pandas()
+
+
+def parse_cached_file(path, target):
+    """
+    Parse and type a local file and try to write it (and its validation report)
+    as the snapshot `target`. Returns (df, report), or (None, None) for other
+    formats. Unwritable cache directories and columns Arrow cannot represent
+    (e.g. mixed object types) just skip the snapshot.
+    """
+    raw = read_source_file(path, path)
+    if raw is None:
+        return None, None
+    df = apply_bond_schema(raw)
+    report = validate_bonds(raw, df)
+    try:
+        # The report goes first, so an existing snapshot always has one
+        write_validation(report, validation_path(target))
+        write_snapshot(df, target)
+    except (OSError, ValueError, TypeError):
+        pass
+    return df, report
+
+
+def load_cached_file(path, columns=None, nrows=None):
+    """
+    Return the DataFrame for a local XLSX/CSV file, served from its columnar
+    snapshot when one exists for the current file contents. The snapshot always
+    holds every column, typed per BOND_SCHEMA; `columns` and `nrows` only project
+    what is returned. The validation report is written alongside it.
+    """
+    target = snapshot_path(path, file_fingerprint(path))
+    if os.path.exists(target):
+        return read_snapshot(target, columns, nrows)
+
+    df, _ = parse_cached_file(path, target)
+    if df is None:
+        return None
+    if columns is not None:
+        df = df[[name for name in columns if name in df.columns]]
+    return df.head(nrows) if nrows is not None else df
+
+
+# -------------------------------------------
+# UPLOAD DEDUPLICATION CACHE
+# -------------------------------------------
+# Parsed uploads are kept per process, keyed by a hash of the uploaded bytes,
+# so reruns, re-selecting a file and other sessions uploading the same extract
+# skip the parse. Size is capped by the frames' in-memory footprint.
+UPLOAD_CACHE_MAX_BYTES = int(os.environ.get("BOND_UPLOAD_CACHE_MB", "256")) * 1024 * 1024
+
+
+class FrameCache:
+    """Thread-safe LRU of DataFrames (or other values given an explicit size) bounded by total memory usage."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (frame, size in bytes)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, df, size=None):
+        if size is None:
+            size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (df, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+
+upload_cache = FrameCache(UPLOAD_CACHE_MAX_BYTES)
+
+
+def upload_digest(file):
+    """
+    SHA-256 of an upload's bytes, computed once per file object. Streamlit hands
+    out a new UploadedFile on every rerun, so this is one hash per rerun however
+    many caches the upload is looked up in.
+    """
+    digest = getattr(file, "bond_digest", None)
+    if digest is None:
+        digest = hashlib.sha256(file.getvalue()).hexdigest()
+        try:
+            file.bond_digest = digest
+        except AttributeError:
+            pass
+    return digest
+
+
+def _parsed_upload(file):
+    """
+    (typed frame, validation report) for every column of an upload. Both come
+    from one parse and are cached as a single entry, as load_cached_file keeps
+    a snapshot and its report together. Returns (None, None) for unsupported
+    formats.
+    """
+    key = (upload_digest(file), os.path.splitext(file.name)[1].lower(), "parsed")
+    parsed = upload_cache.get(key)
+    if parsed is None:
+        raw = read_source_file(io.BytesIO(file.getvalue()), file.name)
+        if raw is None:
+            return None, None
+        df = apply_bond_schema(raw)
+        report = validate_bonds(raw, df)
+        parsed = (df, report)
+        upload_cache.put(key, parsed, size=int(df.memory_usage(deep=True).sum()
+                                               + report["rejected"].memory_usage(deep=True).sum()))
+    return parsed
+
+
+def load_upload(file, columns=None, nrows=None):
+    """
+    Parse and type an uploaded file (anything with .name and .getvalue(), e.g. a
+    Streamlit UploadedFile). Reads, previews included, are served from
+    `upload_cache` when the same bytes were parsed before; the returned frame is
+    shared, so treat it as read-only. Returns None for unsupported formats.
+    """
+    if columns is None and nrows is None:
+        return _parsed_upload(file)[0]
+
+    extension = os.path.splitext(file.name)[1].lower()
+    full = upload_cache.get((upload_digest(file), extension, "parsed"))
+    if full is not None:
+        # Already parsed in full: project instead of parsing again
+        df = full[0] if columns is None else full[0][[name for name in columns if name in full[0].columns]]
+        return df.head(nrows) if nrows is not None else df
+
+    key = (upload_digest(file), extension, tuple(columns) if columns is not None else None, nrows)
+    df = upload_cache.get(key)
+    if df is None:
+        df = read_source_file(io.BytesIO(file.getvalue()), file.name, columns=columns, nrows=nrows)
+        if df is None:
+            return None
+        df = apply_bond_schema(df)
+        upload_cache.put(key, df)
+    return df
+
+
+def load_upload_validation(file):
+    """
+    Validation report for every column of an uploaded file, from the same
+    cached parse as load_upload(file).
+    """
+    return _parsed_upload(file)[1]
+
+
+# -------------------------------------------
+# PROCESS-WIDE SHARED DATASETS
+# -------------------------------------------
+# The default workbook is opened once per process as a memory-mapped Arrow
+# table and every session is handed the same read-only frame, so memory does
+# not grow with the number of connected users. Anything computed from a
+# dataset (aggregates, indexes, ...) is cached on it via `derived`.
+class BondDataset:
+    """An immutable bond table shared across sessions, plus values derived from it."""
+
+    def __init__(self, key, table):
+        self.key = key
+        self.table = table
+        # Arrow buffers are reused where the types allow (numbers, strings); built once per process
+        self.df = table.to_pandas(split_blocks=True)
+        self.validation = None
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    def derived(self, name, build):
+        """Return build(df), computed once per dataset and shared by every caller."""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.df)
+            return self._derived[name]
+
+    def view(self):
+        """A session-local frame over the shared data; with copy-on-write, edits never reach other sessions."""
+        return self.df.copy(deep=False)
+
+
+_shared_datasets = {}
+_shared_lock = threading.Lock()
+
+
+def shared_dataset(path):
+    """
+    Return the process-wide BondDataset for a local XLSX/CSV file, reopening it
+    only when the file's contents change.
+    """
+    key = file_fingerprint(path)
+    dataset = _shared_datasets.get(path)
+    if dataset is not None and dataset.key == key:
+        return dataset
+
+    with _shared_lock:
+        dataset = _shared_datasets.get(path)
+        if dataset is None or dataset.key != key:
+            target = snapshot_path(path, key)
+            df = report = None
+            if not os.path.exists(target):
+                df, report = parse_cached_file(path, target)
+                if df is None:
+                    raise ValueError(f"Unsupported bond file: {path}")
+            if os.path.exists(target):
+                table = pa.ipc.open_file(pa.memory_map(target)).read_all()
+                report = read_validation(validation_path(target))
+            else:
+                # No snapshot could be written (e.g. a read-only deploy): keep this process's parse in memory
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            dataset = BondDataset(key, table)
+            dataset.validation = report
+            _shared_datasets[path] = dataset
+            # Opened on demand after all: the warm-up's failure no longer needs reporting
+            _warmup_errors.pop(path, None)
+    return dataset
+
+
+# -------------------------------------------
+# BACKGROUND WARM-UP
+# -------------------------------------------
+# The default dataset is opened (parsing and typing the workbook if there is
+# no snapshot yet) and its derived values computed on a daemon thread when
+# the app process starts, so the first user does not wait for them.
+_warmups = {}
+_warmup_errors = {}
+_warmup_lock = threading.Lock()
+
+
+def _warm(path, derived):
+    try:
+        dataset = shared_dataset(path)
+        for name, build in derived.items():
+            dataset.derived(name, build)
+    except Exception as e:
+        # The workflow falls back to loading on demand and reports the error there
+        _warmup_errors[path] = e
+
+
+def start_warmup(path, derived=None):
+    """Start warming `path` in the background, once per process. `derived` maps names to builders."""
+    with _warmup_lock:
+        thread = _warmups.get(path)
+        if thread is None:
+            thread = threading.Thread(target=_warm, args=(path, dict(derived or {})),
+                                      name=f"warmup-{os.path.basename(path)}", daemon=True)
+            _warmups[path] = thread
+            thread.start()
+    return thread
+
+
+def warmup_ready(path):
+    """True once the warm-up for `path` has finished (or was never started)."""
+    thread = _warmups.get(path)
+    return thread is None or not thread.is_alive()
+
+
+def warmup_error(path):
+    """The exception the warm-up for `path` failed with, or None."""
+    return _warmup_errors.get(path)
+
+
+def wait_for_warmup(path, timeout=None):
+    thread = _warmups.get(path)
+    if thread is not None:
+        thread.join(timeout)
+    return warmup_ready(path)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+
+# -------------------------------------------
+# DAY-COUNT CONVENTIONS
+# -------------------------------------------
+# Year fractions between arrays of start and end dates (datetime64[D]) under
+# the market day-count conventions. Each convention is computed for a whole
+# array at once; mixed-convention arrays are split into one group per
+# convention, so the cost is a handful of array passes however many bonds
+# there are.
+#
+# Conventions are identified by their index in DAY_COUNT_NAMES. Labels from
+# the "Day count convention" column are mapped to those codes once per
+# dataset with day_count_codes; unrecognised labels map to -1 and get NaN
+# year fractions, as do pairs with a missing (NaT) start or end date.
+def _days(start, end):
+    return (end - start).astype("int64")
+
+
+def _ymd(dates):
+    year = dates.astype("datetime64[Y]")
+    month = dates.astype("datetime64[M]")
+    day = (dates - month.astype("datetime64[D]")).astype("int64") + 1
+    return year.astype("int64") + 1970, (month - year.astype("datetime64[M]")).astype("int64") + 1, day
+
+
+def _days_360(start, end, d1, d2):
+    y1, m1, _ = _ymd(start)
+    y2, m2, _ = _ymd(end)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0
+
+
+def actual_365(start, end):
+    """Actual/365 (Fixed): actual days over 365."""
+    return _days(start, end) / 365.0
+
+
+def actual_360(start, end):
+    """Actual/360: actual days over 360."""
+    return _days(start, end) / 360.0
+
+
+def thirty_360(start, end):
+    """30/360 (US bond basis): day 31 becomes 30, on the end date only when the start is the 30th or 31st."""
+    d1 = np.minimum(_ymd(start)[2], 30)
+    d2 = _ymd(end)[2]
+    d2 = np.where((d1 == 30) & (d2 == 31), 30, d2)
+    return _days_360(start, end, d1, d2)
+
+
+def thirty_e_360(start, end):
+    """30E/360 (Eurobond basis): day 31 becomes 30 on both dates."""
+    return _days_360(start, end, np.minimum(_ymd(start)[2], 30), np.minimum(_ymd(end)[2], 30))
+
+
+def actual_actual(start, end):
+    """Actual/Actual (ISDA): days in each calendar year over that year's length."""
+    start_year = start.astype("datetime64[Y]")
+    end_year = end.astype("datetime64[Y]")
+
+    def year_length(year):
+        return ((year + 1).astype("datetime64[D]") - year.astype("datetime64[D]")).astype("int64")
+
+    same_year = _days(start, end) / year_length(start_year)
+    head = _days(start, (start_year + 1).astype("datetime64[D]")) / year_length(start_year)
+    tail = _days(end_year.astype("datetime64[D]"), end) / year_length(end_year)
+    whole = (end_year - start_year).astype("int64") - 1
+    return np.where(start_year == end_year, same_year, head + whole + tail)
+
+
+DAY_COUNT_NAMES = ["Actual/365", "Actual/360", "30/360", "30E/360", "Actual/Actual"]
+DAY_COUNTS = [actual_365, actual_360, thirty_360, thirty_e_360, actual_actual]
+
+# Spellings seen in listings, after upper-casing and removing spaces
+_ALIASES = {
+    "ACTUAL/365": 0, "ACT/365": 0, "ACTUAL/365F": 0, "ACT/365F": 0, "ACTUAL/365(FIXED)": 0, "ACT/365(FIXED)": 0,
+    "ACTUAL/360": 1, "ACT/360": 1,
+    "30/360": 2, "30/360US": 2, "30U/360": 2, "BONDBASIS": 2,
+    "30E/360": 3, "30/360E": 3, "EUROBONDBASIS": 3,
+    "ACTUAL/ACTUAL": 4, "ACT/ACT": 4, "ACTUAL/ACTUAL(ISDA)": 4, "ACT/ACT(ISDA)": 4,
+}
+
+
+def day_count_code(label):
+    """Index into DAY_COUNT_NAMES for a day-count label, -1 if it is not recognised."""
+    if label is None or pd.isna(label):
+        return -1
+    return _ALIASES.get(str(label).upper().replace(" ", ""), -1)
+
+
+def day_count_codes(labels):
+    """day_count_code for every entry of `labels`, mapping each distinct label once."""
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object), use_na_sentinel=True)
+    lookup = np.array([day_count_code(label) for label in uniques] + [-1], dtype="int8")
+    return lookup[codes]
+
+
+def year_fraction(start, end, convention):
+    """Year fractions from `start` to `end` under one convention (name or code)."""
+    code = convention if isinstance(convention, (int, np.integer)) else day_count_code(convention)
+    if code < 0:
+        raise ValueError(f"Unknown day count convention: {convention!r}")
+    start, end = np.broadcast_arrays(np.asarray(start, dtype="datetime64[D]"), np.asarray(end, dtype="datetime64[D]"))
+    fractions = np.full(start.shape, np.nan)
+    dated = ~np.isnat(start) & ~np.isnat(end)
+    fractions[dated] = DAY_COUNTS[code](start[dated], end[dated])
+    return fractions if fractions.ndim else float(fractions)
+
+
+def year_fractions(start, end, codes):
+    """Year fractions from `start` to `end`, each under its own convention code (NaN for -1 or a NaT date)."""
+    start = np.asarray(start, dtype="datetime64[D]")
+    end = np.asarray(end, dtype="datetime64[D]")
+    codes = np.asarray(codes)
+    fractions = np.full(len(codes), np.nan)
+    dated = ~np.isnat(start) & ~np.isnat(end)
+    for code in np.unique(codes):
+        if code < 0:
+            continue
+        group = np.flatnonzero((codes == code) & dated)
+        fractions[group] = DAY_COUNTS[code](start[group], end[group])
+    return fractions
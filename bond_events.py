@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from bond_cashflows import COUPON, REDEMPTION, listed_coupons
+
+
+# -------------------------------------------
+# BOND EVENT INDEX
+# -------------------------------------------
+# Books close dates, coupon payments and redemptions of every bond, taken
+# once from the listed Coupon Dates / Books Close Dates pairs and the
+# cash-flow schedule (whose Books Closed Period rule covers only the coupons
+# after a bond's last listed one) and kept as date-sorted arrays, so calendar queries are
+# binary searches instead of scans over the 20 date columns of every row.
+#
+# A bond is in its books-closed period from the day after a books close date
+# until the day before that coupon is paid; during it the bond trades ex
+# coupon (see CashFlows.accrued). Closed periods are at most a few weeks long,
+# so the periods covering a day all start within `max_closed_days` before
+# it: a stabbing query searches that window of the start-sorted periods.
+BOOKS_CLOSE = 0
+COUPON_PAYMENT = 1
+REDEMPTION_PAYMENT = 2
+EVENT_LABELS = {BOOKS_CLOSE: "Books close", COUPON_PAYMENT: "Coupon", REDEMPTION_PAYMENT: "Redemption"}
+
+
+class EventIndex:
+    """
+    Date-sorted bond events (`date`, `bond` row, `kind`, cash `amount`) and
+    books-closed periods (`closed_start`, `closed_end` exclusive, `closed_bond`)
+    sorted by start.
+    """
+
+    def __init__(self, date, bond, kind, amount, closed_start, closed_end, closed_bond):
+        self.date = date
+        self.bond = bond
+        self.kind = kind
+        self.amount = amount
+        self.closed_start = closed_start
+        self.closed_end = closed_end
+        self.closed_bond = closed_bond
+        self.closed_ends_sorted = np.sort(closed_end)
+        self.max_closed_days = int((closed_end - closed_start).astype("int64").max(initial=0))
+
+    def __len__(self):
+        return len(self.date)
+
+    def memory_usage(self):
+        return sum(array.nbytes for array in (self.date, self.bond, self.kind, self.amount, self.closed_start,
+                                               self.closed_end, self.closed_bond, self.closed_ends_sorted))
+
+    def events_between(self, start, end):
+        """Positions of the events dated start..end (inclusive), in date order."""
+        lo = np.searchsorted(self.date, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.date, np.datetime64(end, "D"), side="right")
+        return np.arange(lo, hi)
+
+    def counts(self, start, end):
+        """Number of events of each type dated start..end, by label."""
+        found = self.events_between(start, end)
+        counts = np.bincount(self.kind[found], minlength=len(EVENT_LABELS))
+        return {label: int(counts[kind]) for kind, label in EVENT_LABELS.items()}
+
+    def closed_count(self, day):
+        """Number of books-closed periods covering `day`: periods started by then minus those ended by then."""
+        day = np.datetime64(day, "D")
+        return int(np.searchsorted(self.closed_start, day, side="right")
+                   - np.searchsorted(self.closed_ends_sorted, day, side="right"))
+
+    def closed_between(self, start, end):
+        """Positions of the books-closed periods overlapping start..end (inclusive)."""
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        lo = np.searchsorted(self.closed_start, start - self.max_closed_days, side="left")
+        hi = np.searchsorted(self.closed_start, end, side="right")
+        candidates = np.arange(lo, hi)
+        return candidates[self.closed_end[candidates] > start]
+
+    def closed_on(self, day):
+        """Positions of the books-closed periods covering `day`."""
+        return self.closed_between(day, day)
+
+    def calendar(self, start, end):
+        """Event counts per day (rows) and event type (columns) between start and end."""
+        found = self.events_between(start, end)
+        frame = pd.DataFrame({
+            "Date": self.date[found].astype("datetime64[ns]"),
+            "Event": pd.Categorical.from_codes(self.kind[found], list(EVENT_LABELS.values())),
+        })
+        return pd.crosstab(frame["Date"], frame["Event"], dropna=False)
+
+    def frame(self, df, columns, positions):
+        """The events at `positions` as a table, with `columns` of each event's bond."""
+        bonds = self.bond[positions]
+        table = df.iloc[bonds][[column for column in columns if column in df.columns]].reset_index(drop=True)
+        table.insert(0, "Event", np.array(list(EVENT_LABELS.values()), dtype=object)[self.kind[positions]])
+        table.insert(0, "Date", self.date[positions].astype("datetime64[ns]"))
+        table["Amount"] = np.where(self.kind[positions] == BOOKS_CLOSE, np.nan, self.amount[positions])
+        return table
+
+    def closed_frame(self, df, columns, positions):
+        """The books-closed periods at `positions` as a table, with `columns` of each bond."""
+        bonds = self.closed_bond[positions]
+        table = df.iloc[bonds][[column for column in columns if column in df.columns]].reset_index(drop=True)
+        table["Closed From"] = self.closed_start[positions].astype("datetime64[ns]")
+        table["Coupon Date"] = self.closed_end[positions].astype("datetime64[ns]")
+        return table
+
+
+def books_closed_periods(cash_flows, df):
+    """
+    (bond row, books close date, coupon date) of every books-closed period:
+    the listed pairs of the bonds in `df`, then the Books Closed Period rule
+    of their cash-flow schedule for the coupons after a bond's last listed one.
+    """
+    listed_bond, listed_pay, listed_close = listed_coupons(df)
+    last_listed = np.full(len(df), np.iinfo("int64").min)
+    np.maximum.at(last_listed, listed_bond, listed_pay.astype("datetime64[D]").astype("int64"))
+    coupons = np.flatnonzero(cash_flows.kind == COUPON)
+    bond, pay = cash_flows.bond[coupons], cash_flows.date[coupons].astype("datetime64[D]")
+    ruled = coupons[~np.isnat(cash_flows.books_close[coupons]) & (pay.astype("int64") > last_listed[bond])]
+    return (np.concatenate([listed_bond, cash_flows.bond[ruled]]),
+            np.concatenate([listed_close, cash_flows.books_close[ruled]]).astype("datetime64[D]"),
+            np.concatenate([listed_pay, cash_flows.date[ruled]]).astype("datetime64[D]"))
+
+
+def build_event_index(cash_flows, df):
+    """
+    Index the books close, coupon and redemption events of the bonds in `df`
+    and their cash-flow schedule, with books close dates as in
+    books_closed_periods.
+    """
+    coupons = np.flatnonzero(cash_flows.kind == COUPON)
+    redemptions = np.flatnonzero(cash_flows.kind == REDEMPTION)
+    close_bond, close_date, close_pay = books_closed_periods(cash_flows, df)
+    # Listed coupons of bonds the schedule cannot project (e.g. floating rate) are paid in an unknown amount
+    listed_bond, listed_pay, _ = listed_coupons(df)
+    unprojected = ~np.isin(listed_bond, cash_flows.bond[coupons])
+    listed_bond, listed_pay = listed_bond[unprojected], listed_pay[unprojected]
+
+    date = np.concatenate([close_date, cash_flows.date[coupons], listed_pay, cash_flows.date[redemptions]])
+    bond = np.concatenate([close_bond, cash_flows.bond[coupons], listed_bond, cash_flows.bond[redemptions]])
+    kind = np.concatenate([np.full(len(close_bond), BOOKS_CLOSE, dtype="int8"),
+                           np.full(len(coupons) + len(listed_bond), COUPON_PAYMENT, dtype="int8"),
+                           np.full(len(redemptions), REDEMPTION_PAYMENT, dtype="int8")])
+    amount = np.concatenate([np.full(len(close_bond), np.nan), cash_flows.amount[coupons],
+                             np.full(len(listed_bond), np.nan), cash_flows.amount[redemptions]])
+    order = np.lexsort((kind, bond, date))
+
+    closed_start = close_date + 1
+    closed = np.flatnonzero(close_pay > closed_start)
+    closed = closed[np.argsort(closed_start[closed], kind="stable")]
+    return EventIndex(date[order], bond[order], kind[order], amount[order], closed_start[closed], close_pay[closed],
+                      close_bond[closed])
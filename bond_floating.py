@@ -0,0 +1,124 @@
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from bond_cashflows import COUPON, number_array
+
+
+# -------------------------------------------
+# FLOATING-RATE COUPON PROJECTION
+# -------------------------------------------
+# Re-projects the coupons of every floating-rate note (rows with a Reference
+# Rate) from a forward curve of the reference rates, in one pass over the
+# cash-flow arrays. A note's coupon rate is its reference rate plus or minus
+# its Basis Points, by Over/Under Indicator:
+#
+#   Over                       reference + margin
+#   Under                      reference - margin
+#   margin/bps less ref rate   margin - reference
+#
+# Coupons whose period started on or before the valuation date are already
+# fixed and keep their amount; later ones are reset in advance at the forward
+# rate for their period start. Projected coupon rates are floored at zero.
+#
+# A forward curve is a table of (Reference Rate, Tenor in years, Rate in
+# percent); rows without a Reference Rate apply to every index. Without a
+# curve, or for an index it does not cover, each note's last fixing (implied
+# by its current Coupon Rate) is carried forward. The shock is a parallel
+# shift in basis points on top of either.
+FLOATING_COLUMNS = ["Reference Rate", "Basis Points", "Over/Under Indicator", "Coupon Rate", "Nominal Amount"]
+
+# (sign of the reference rate, sign of the margin) per Over/Under Indicator
+SPREAD_SIGNS = {"Over": (1, 1), "Under": (1, -1), "margin/bps less ref rate": (-1, 1)}
+
+_TENOR = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([DWMY]?)\s*$", re.IGNORECASE)
+_TENOR_YEARS = {"": 1.0, "Y": 1.0, "M": 1 / 12, "W": 7 / 365, "D": 1 / 365}
+
+
+def _tenor_years(value):
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    match = _TENOR.match(str(value))
+    if match is None:
+        raise ValueError(f"Unrecognised tenor {value!r}: use years (0.25, 1) or 3M, 1Y, ...")
+    return float(match.group(1)) * _TENOR_YEARS[match.group(2).upper()]
+
+
+def read_forward_curve(file):
+    """
+    Read a forward curve from CSV (a path or file-like object) with columns
+    Tenor (years or 3M/1Y/...), Rate (percent) and, optionally, Reference
+    Rate. Raises ValueError when the columns or values are unusable.
+    """
+    raw = pd.read_csv(file)
+    columns = {column.strip().lower(): column for column in raw.columns}
+    missing = [name for name in ("tenor", "rate") if name not in columns]
+    if missing:
+        raise ValueError(f"Forward curve is missing column(s): {', '.join(missing)}")
+
+    curve = pd.DataFrame({
+        "Reference Rate": (raw[columns["reference rate"]].astype("string").str.strip()
+                           if "reference rate" in columns else pd.Series(pd.NA, index=raw.index, dtype="string")),
+        "Tenor": [_tenor_years(value) for value in raw[columns["tenor"]]],
+        "Rate": pd.to_numeric(raw[columns["rate"]], errors="coerce"),
+    })
+    if curve["Rate"].isna().any():
+        raise ValueError("Forward curve has rates that are not numbers")
+    return curve.sort_values(["Reference Rate", "Tenor"], na_position="first", ignore_index=True)
+
+
+def curve_key(curve, shock_bps):
+    """Short content hash of a curve and shock, for caching projections."""
+    text = "" if curve is None else curve.to_csv(index=False)
+    return hashlib.sha256(f"{text}|{float(shock_bps)}".encode("utf-8")).hexdigest()[:16]
+
+
+def _forward_rates(curve, references, tenors, fallback):
+    """Forward reference rates at `tenors`, interpolated flat-extrapolated on each index's curve."""
+    rates = fallback.copy()
+    if curve is None or curve.empty:
+        return rates
+    generic = curve[curve["Reference Rate"].isna()]
+    covered = np.zeros(len(tenors), dtype=bool)
+    for reference, points in curve.dropna(subset=["Reference Rate"]).groupby("Reference Rate", sort=False):
+        group = np.flatnonzero(references == reference)
+        rates[group] = np.interp(tenors[group], points["Tenor"].to_numpy(), points["Rate"].to_numpy())
+        covered[group] = True
+    if not generic.empty:
+        rest = np.flatnonzero(~covered)
+        rates[rest] = np.interp(tenors[rest], generic["Tenor"].to_numpy(), generic["Rate"].to_numpy())
+    return rates
+
+
+def project_floating(cash_flows, df, valuation, curve=None, shock_bps=0.0):
+    """
+    `cash_flows` (built from `df`) with every floating-rate coupon reset after
+    `valuation` re-projected from `curve` shifted by `shock_bps`.
+    """
+    day = np.datetime64(valuation, "D")
+    references = (df["Reference Rate"].astype("string").str.strip().to_numpy(dtype=object, na_value=None)
+                  if "Reference Rate" in df.columns else np.full(len(df), None, dtype=object))
+    indicator = (df["Over/Under Indicator"].astype(object) if "Over/Under Indicator" in df.columns
+                 else pd.Series(None, index=df.index, dtype=object))
+    signs = np.stack([
+        indicator.map({value: sign[k] for value, sign in SPREAD_SIGNS.items()}).fillna(1).to_numpy(dtype="float64")
+        for k in (0, 1)
+    ], axis=1)
+    margin = np.nan_to_num(number_array(df, "Basis Points")) / 100.0
+    current = number_array(df, "Coupon Rate")
+    nominal = number_array(df, "Nominal Amount")
+
+    bond = cash_flows.bond
+    reset = np.flatnonzero((cash_flows.kind == COUPON) & (cash_flows.start > day) & pd.notna(references[bond]))
+    bond = bond[reset]
+    ref_sign, margin_sign = signs[bond, 0], signs[bond, 1]
+    last_fixing = (current[bond] - margin_sign * margin[bond]) / ref_sign
+    tenors = (cash_flows.start[reset] - day).astype("int64") / 365.0
+    forward = _forward_rates(curve, references[bond], tenors, last_fixing) + shock_bps / 100.0
+    rate = np.maximum(ref_sign * forward + margin_sign * margin[bond], 0.0)
+
+    amount = cash_flows.amount.copy()
+    amount[reset] = nominal[bond] * rate / 100.0 * cash_flows.fraction[reset]
+    return cash_flows.with_amounts(amount)
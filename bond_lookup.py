@@ -0,0 +1,49 @@
+import sys
+
+
+# -------------------------------------------
+# INSTRUMENT LOOKUP
+# -------------------------------------------
+# A hash index from ISIN and Alpha Code to row position, built once per
+# dataset version, so looking up one instrument is a dict access and an
+# iloc instead of a filter over the whole frame. Codes are matched ignoring
+# case and surrounding spaces; if a code appears on more than one row the
+# first row wins.
+LOOKUP_COLUMNS = ["ISIN", "Alpha Code"]
+
+
+def normalise_code(code):
+    return str(code).strip().upper()
+
+
+class BondLookup:
+    """Row positions by normalised ISIN / Alpha Code."""
+
+    def __init__(self, positions):
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, code):
+        return normalise_code(code) in self.positions
+
+    def find(self, code):
+        """Row position of the instrument with this ISIN or Alpha Code, or None."""
+        return self.positions.get(normalise_code(code))
+
+    def memory_usage(self):
+        return sys.getsizeof(self.positions) + sum(sys.getsizeof(code) for code in self.positions)
+
+
+def build_bond_lookup(df):
+    """Index every row of `df` by its ISIN and Alpha Code."""
+    positions = {}
+    for column in LOOKUP_COLUMNS:
+        if column not in df.columns:
+            continue
+        codes = df[column].astype("string").str.strip().str.upper().to_numpy(dtype=object, na_value=None)
+        for row, code in enumerate(codes):
+            if code:
+                positions.setdefault(code, row)
+    return BondLookup(positions)
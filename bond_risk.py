@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from bond_cashflows import COUPON, date_array, number_array
+from bond_yields import coupon_frequency, settlement_flows
+
+
+# -------------------------------------------
+# INTEREST-RATE RISK
+# -------------------------------------------
+# Macaulay and modified duration, convexity and DV01 of every live bond (by
+# Instrument Status) with cash flows left on the valuation date, in one pass
+# over the cash-flow arrays (per-bond sums with np.bincount, as in the yield
+# solver). Cancelled, matured and not-yet-issued notes carry no risk.
+#
+# Each bond is discounted at its yield at issue where one was solved, else at
+# its coupon rate (a par-yield approximation; the data has no market
+# yields), compounding at the coupon frequency. Floating-rate notes reprice
+# at their next reset, so only the current coupon and par at the next coupon
+# date are rate-sensitive; a note whose next flow is already its redemption
+# is just that redemption.
+#
+# Per-bond results are built once per dataset version and valuation date;
+# aggregate_risk re-groups them for any filter without touching cash flows.
+MATURITY_BUCKETS = [0, 1, 3, 5, 7, 10, 20, np.inf]
+MATURITY_BUCKET_LABELS = ["< 1y", "1-3y", "3-5y", "5-7y", "7-10y", "10-20y", "20y +"]
+RISK_GROUPS = ["Issuer Name", "Sub Sector", "Maturity Bucket"]
+LIVE_STATUSES = ["Active", "Listed", "Listed but pending Coupon Rate"]
+
+RISK_COLUMNS = ["Issuer Name", "Sub Sector", "Instrument Status", "Reference Rate", "Coupon Rate", "Coupon Frequency",
+                "Nominal Amount", "Pricing Redemption Date"]
+
+
+def bond_risk(cash_flows, df, valuation, yields=None, statuses=LIVE_STATUSES):
+    """
+    Per-bond risk on `valuation`, indexed by row position. `yields` is the
+    bond_yields frame whose YTM is used where present; only bonds in
+    `statuses` are included (every bond when None or without a status column).
+    """
+    day = np.datetime64(valuation, "D")
+    rows = np.unique(cash_flows.bond[cash_flows.date > day])
+    if statuses is not None and "Instrument Status" in df.columns:
+        rows = rows[df["Instrument Status"].iloc[rows].isin(statuses).to_numpy()]
+    nominal = number_array(df, "Nominal Amount")[rows]
+    rows, nominal = rows[nominal > 0], nominal[nominal > 0]
+    settle = np.full(len(rows), day)
+    owner, flows, times, _ = settlement_flows(cash_flows, rows, settle)
+    per_100 = cash_flows.amount[flows] / nominal[owner] * 100.0
+
+    floating = (df["Reference Rate"].notna().to_numpy() if "Reference Rate" in df.columns
+                else np.zeros(len(df), dtype=bool))[rows]
+    # Floating-rate notes: keep their first remaining flow and, when it is a coupon, redeem at par on its date
+    first = np.r_[True, owner[1:] != owner[:-1]] if len(owner) else np.zeros(0, dtype=bool)
+    keep = ~floating[owner] | first
+    reset = np.flatnonzero(first & floating[owner] & (cash_flows.kind[flows] == COUPON))
+    owner = np.concatenate([owner[keep], owner[reset]])
+    times = np.concatenate([times[keep], times[reset]])
+    per_100 = np.concatenate([per_100[keep], np.full(len(reset), 100.0)])
+
+    rate = number_array(df, "Coupon Rate")[rows] / 100.0
+    if yields is not None:
+        at_issue = pd.Series(yields["YTM (%)"].to_numpy() / 100.0, index=yields.index)
+        rate = np.where(np.isin(rows, at_issue.index), at_issue.reindex(rows).to_numpy(), rate)
+    rate = np.nan_to_num(rate)
+    frequency = coupon_frequency(df)[rows]
+
+    base = 1.0 + rate / frequency
+    discount = base[owner] ** (-frequency[owner] * times)
+    value = per_100 * discount
+    price = np.bincount(owner, value, minlength=len(rows))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        macaulay = np.bincount(owner, value * times, minlength=len(rows)) / price
+        modified = macaulay / base
+        convexity = (np.bincount(owner, value * times * (times + 1.0 / frequency[owner]), minlength=len(rows))
+                     / (price * base ** 2))
+    market_value = price / 100.0 * nominal
+
+    maturity = date_array(df, "Pricing Redemption Date")[rows]
+    years = (maturity - day).astype("int64") / 365.0
+    risk = pd.DataFrame({
+        "Issuer Name": df["Issuer Name"].iloc[rows].to_numpy() if "Issuer Name" in df.columns else None,
+        "Sub Sector": df["Sub Sector"].iloc[rows].to_numpy() if "Sub Sector" in df.columns else None,
+        "Maturity Bucket": pd.cut(years, MATURITY_BUCKETS, labels=MATURITY_BUCKET_LABELS, right=False),
+        "Rate Type": np.where(floating, "Floating", "Fixed"),
+        "Yield (%)": rate * 100.0,
+        "Price": price,
+        "Market Value": market_value,
+        "Macaulay Duration": macaulay,
+        "Modified Duration": modified,
+        "Convexity": convexity,
+        "DV01": modified * market_value * 1e-4,
+    }, index=pd.Index(rows, name="Row"))
+    return risk[price > 0]
+
+
+def aggregate_risk(risk, by):
+    """
+    Risk per group of `by`: bond count, market value and DV01 totals, and
+    market-value-weighted durations and convexity.
+    """
+    weighted = risk[["Macaulay Duration", "Modified Duration", "Convexity"]].mul(risk["Market Value"], axis=0)
+    frame = pd.concat([risk[[by, "Market Value", "DV01"]], weighted.add_prefix("mv_")], axis=1)
+    groups = frame.groupby(by, observed=True, sort=False)
+    totals = groups.sum()
+    table = pd.DataFrame({
+        "Bonds": groups.size(),
+        "Market Value": totals["Market Value"],
+        "DV01": totals["DV01"],
+    })
+    for column in ("Macaulay Duration", "Modified Duration", "Convexity"):
+        table[column] = totals["mv_" + column] / totals["Market Value"]
+    return table.sort_values("DV01", ascending=False)
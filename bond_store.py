@@ -0,0 +1,162 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bond_aggregates import (AGGREGATE_COLUMNS, AggregateCube, aggregates_from_cube, build_aggregates,
+                             refresh_aggregates)
+from bond_data import apply_bond_schema, read_snapshot, write_feather
+
+
+# -------------------------------------------
+# LOCAL BOND STORE (UPSERT BY ISIN)
+# -------------------------------------------
+# Newer extracts are merged into a persistent store instead of replacing it.
+# The store keeps every column of every bond seen, keyed by ISIN, together
+# with the aggregates the bond tabs read, so an upsert only has to recompute
+# aggregates for the issuers and maturity years it touched.
+STORE_DIR = os.path.join("data", "store")
+STORE_BONDS = os.path.join(STORE_DIR, "bonds.feather")
+STORE_CUBE_CELLS = os.path.join(STORE_DIR, "cube_cells.feather")
+STORE_CUBE_SKETCH = os.path.join(STORE_DIR, "cube_sketch.feather")
+
+KEY_COLUMN = "ISIN"
+
+# Float cells closer than this (relative) are the same value; CSV round trips perturb the last digits
+FLOAT_RTOL = 1e-9
+
+_store_lock = threading.Lock()
+
+
+def store_exists():
+    return os.path.exists(STORE_BONDS)
+
+
+def load_store(columns=None, nrows=None):
+    """Return (bonds, aggregates) from the local store, or (None, None) if there is none yet."""
+    if not store_exists():
+        return None, None
+    bonds = read_snapshot(STORE_BONDS, columns, nrows)
+    if os.path.exists(STORE_CUBE_CELLS) and os.path.exists(STORE_CUBE_SKETCH):
+        cube = AggregateCube(read_snapshot(STORE_CUBE_CELLS), read_snapshot(STORE_CUBE_SKETCH))
+    else:
+        # Stores written before the cube existed get one built from their bonds
+        cube = AggregateCube.build(read_snapshot(STORE_BONDS, AGGREGATE_COLUMNS))
+    return bonds, aggregates_from_cube(cube)
+
+
+def _save_store(bonds, aggregates):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    write_feather(bonds.reset_index(drop=True), STORE_BONDS)
+    write_feather(aggregates["cube"].cells.reset_index(drop=True), STORE_CUBE_CELLS)
+    write_feather(aggregates["cube"].sketch.reset_index(drop=True), STORE_CUBE_SKETCH)
+
+
+def _differs(old, new):
+    """
+    Element-wise 'value changed' for two aligned columns, treating missing ==
+    missing and floats within FLOAT_RTOL of each other as equal.
+    """
+    old_missing, new_missing = old.isna().to_numpy(), new.isna().to_numpy()
+    both_present = ~old_missing & ~new_missing
+    if pd.api.types.is_float_dtype(old) and pd.api.types.is_float_dtype(new):
+        old_values = old.to_numpy(dtype="float64", na_value=np.nan)
+        new_values = new.to_numpy(dtype="float64", na_value=np.nan)
+        equal = np.isclose(old_values, new_values, rtol=FLOAT_RTOL, atol=0.0)
+        return (old_missing != new_missing) | (both_present & ~equal)
+    old_values, new_values = old.to_numpy(dtype=object, copy=True), new.to_numpy(dtype=object, copy=True)
+    # pd.NA has no truth value, so missing cells are blanked before comparing
+    old_values[~both_present] = new_values[~both_present] = None
+    equal = old_values == new_values
+    return (old_missing != new_missing) | (both_present & ~equal)
+
+
+def diff_bonds(current, incoming):
+    """
+    Compare an incoming extract with the current bonds by ISIN.
+    Returns (inserted ISINs, updated ISINs, long-format table of changed cells).
+    """
+    current = current.set_index(KEY_COLUMN)
+    incoming = incoming.set_index(KEY_COLUMN)
+    inserted = incoming.index.difference(current.index)
+    common = incoming.index.intersection(current.index)
+    shared_columns = [column for column in incoming.columns if column in current.columns]
+
+    old = current.loc[common, shared_columns]
+    new = incoming.loc[common, shared_columns]
+    changed = pd.DataFrame({column: _differs(old[column], new[column]) for column in shared_columns},
+                           index=common)
+    updated = common[changed.any(axis=1).to_numpy()]
+
+    cells = changed.loc[updated].stack()
+    cells = cells[cells]
+    changes = pd.DataFrame({
+        KEY_COLUMN: cells.index.get_level_values(0),
+        "Column": cells.index.get_level_values(1),
+    })
+    if len(changes):
+        changes["Old"] = [old.at[isin, column] for isin, column in zip(changes[KEY_COLUMN], changes["Column"])]
+        changes["New"] = [new.at[isin, column] for isin, column in zip(changes[KEY_COLUMN], changes["Column"])]
+    else:
+        changes["Old"] = changes["New"] = []
+    return inserted, updated, changes
+
+
+def _affected_keys(rows, column):
+    if column not in rows.columns:
+        return set()
+    return set(rows[column].dropna().tolist())
+
+
+def upsert_store(incoming, seed=None):
+    """
+    Upsert an extract into the local store by ISIN: new ISINs are inserted,
+    rows whose values differ are updated in the columns the extract carries
+    (other store columns keep their values), and bonds absent from the
+    extract are kept. An empty store is first seeded with `seed` (e.g. the default
+    workbook). Returns (bonds, aggregates, delta) where delta holds the
+    inserted/updated ISINs, the changed cells and the affected issuers/years.
+    """
+    if KEY_COLUMN not in incoming.columns:
+        raise ValueError(f"Upserts need an '{KEY_COLUMN}' column to match bonds on.")
+    incoming = incoming[incoming[KEY_COLUMN].notna()].drop_duplicates(KEY_COLUMN, keep="last")
+
+    with _store_lock:
+        bonds, aggregates = load_store()
+        if bonds is None:
+            bonds = seed if seed is not None else incoming.iloc[0:0]
+            aggregates = build_aggregates(bonds)
+
+        inserted, updated, changes = diff_bonds(bonds, incoming)
+        replaced = bonds[bonds[KEY_COLUMN].isin(updated)]
+        # Updated bonds take the incoming values over their current row, so columns the extract lacks are kept
+        overlaid = incoming[incoming[KEY_COLUMN].isin(updated)].set_index(KEY_COLUMN)
+        current = replaced.set_index(KEY_COLUMN).reindex(overlaid.index)
+        for column in current.columns.difference(overlaid.columns, sort=False):
+            overlaid[column] = current[column]
+        touched = pd.concat([incoming[incoming[KEY_COLUMN].isin(inserted)], overlaid.reset_index()],
+                            ignore_index=True)
+
+        if len(touched):
+            merged = pd.concat([bonds[~bonds[KEY_COLUMN].isin(updated)], touched], ignore_index=True)
+            # Categoricals from both sides are unioned back into a single typed frame
+            merged = apply_bond_schema(merged)
+        else:
+            merged = bonds.reset_index(drop=True)
+
+        issuers = _affected_keys(touched, "Issuer Name") | _affected_keys(replaced, "Issuer Name")
+        years = _affected_keys(touched, "Maturity Date Year") | _affected_keys(replaced, "Maturity Date Year")
+        aggregates = refresh_aggregates(aggregates, merged, issuers, years)
+        if len(touched) or not os.path.exists(STORE_CUBE_CELLS):
+            _save_store(merged, aggregates)
+
+    delta = {
+        "inserted": list(inserted),
+        "updated": list(updated),
+        "unchanged": len(incoming) - len(inserted) - len(updated),
+        "changes": changes,
+        "issuers": sorted(str(issuer) for issuer in issuers),
+        "years": sorted(int(year) for year in years),
+    }
+    return merged, aggregates, delta
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+from bond_cashflows import COUPON, FREQUENCY_MONTHS, date_array, number_array
+
+
+# -------------------------------------------
+# YIELD SOLVER
+# -------------------------------------------
+# Yields for many bonds at once. Cash flows are flat arrays tagged with the
+# bond they belong to (`owner`, 0..n-1); present values and their derivatives
+# are per-bond sums taken with np.bincount, so one Newton step updates every
+# bond's yield in a few array passes. Bonds Newton does not settle within
+# NEWTON_ITERATIONS (or that it pushes outside the bracket) are finished by
+# bisection on the bracket, where the price is monotonic in the yield.
+#
+# Yields compound at the bond's coupon frequency (annually for bonds without
+# periodic coupons), with times in Actual/365 years from settlement.
+NEWTON_ITERATIONS = 30
+BISECTION_ITERATIONS = 60
+PRICE_TOLERANCE = 1e-10
+YIELD_BRACKET = (-0.9, 5.0)
+
+YIELD_COLUMNS = ["Reference Rate", "Linked / Reference Index", "Issue Price", "Issue Price Format", "Issue Date",
+                 "Call Date", "Coupon Frequency", "Coupon Rate", "Issue Type", "Nominal Amount",
+                 "Pricing Redemption Date"]
+
+
+def present_values(owner, times, flows, yields, frequency):
+    """Per-bond present values of `flows` at `yields`, and their derivatives in the yield."""
+    base = 1.0 + yields[owner] / frequency[owner]
+    discount = base ** (-frequency[owner] * times)
+    pv = np.bincount(owner, flows * discount, minlength=len(yields))
+    slope = np.bincount(owner, -flows * times * discount / base, minlength=len(yields))
+    return pv, slope
+
+
+def solve_yields(owner, times, flows, prices, frequency, guess=None):
+    """
+    Yields (decimal) at which each bond's flows are worth its dirty price, NaN
+    where no yield in YIELD_BRACKET prices it.
+    """
+    low, high = YIELD_BRACKET
+    yields = np.full(len(prices), 0.1) if guess is None else np.clip(np.nan_to_num(guess, nan=0.1), low, high)
+    solved = np.zeros(len(prices), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(NEWTON_ITERATIONS):
+            pv, slope = present_values(owner, times, flows, yields, frequency)
+            solved = np.abs(pv - prices) <= PRICE_TOLERANCE * np.maximum(prices, 1.0)
+            if solved.all():
+                break
+            step = (pv - prices) / slope
+            yields = np.where(solved, yields, yields - step)
+            yields = np.where(np.isfinite(yields), yields, high)
+            yields = np.clip(yields, low, high)
+
+        rest = np.flatnonzero(~solved)
+        if len(rest):
+            # Bisection on the bonds Newton left: price falls as the yield rises
+            lo, hi = np.full(len(rest), low), np.full(len(rest), high)
+            keep = np.isin(owner, rest)
+            remap = np.full(len(prices), -1)
+            remap[rest] = np.arange(len(rest))
+            sub_owner, sub_times, sub_flows = remap[owner[keep]], times[keep], flows[keep]
+            sub_frequency, sub_prices = frequency[rest], prices[rest]
+            bracketed = ((present_values(sub_owner, sub_times, sub_flows, lo, sub_frequency)[0] >= sub_prices)
+                         & (present_values(sub_owner, sub_times, sub_flows, hi, sub_frequency)[0] <= sub_prices))
+            for _ in range(BISECTION_ITERATIONS):
+                mid = (lo + hi) / 2.0
+                above = present_values(sub_owner, sub_times, sub_flows, mid, sub_frequency)[0] > sub_prices
+                lo, hi = np.where(above, mid, lo), np.where(above, hi, mid)
+            yields[rest] = np.where(bracketed, (lo + hi) / 2.0, np.nan)
+    return yields
+
+
+# -------------------------------------------
+# FIXED-RATE YIELDS AT ISSUE
+# -------------------------------------------
+# The dataset has no market prices, so yields are solved at each bond's Issue
+# Date from its Issue Price (taken as a clean price per 100 nominal; only
+# PERCENT prices are used). Fixed-rate means no Reference Rate, no inflation
+# index and a coupon rate; zero-coupon notes are included. Yield to call
+# redeems at par on a Call Date before maturity; yield to worst is the lower
+# of the two.
+MAX_PRICE = 1000.0
+ZERO_COUPON = ("No Coupon", "ZCNT-Zero Coupon Note")
+
+
+def settlement_flows(cash_flows, rows, settle):
+    """
+    The flows of bond `rows` still to be received on their `settle` dates,
+    as (owner, flow positions, times in years, accrued interest per bond in
+    rand), owners indexing `rows`. An ex-coupon settlement drops that coupon.
+    """
+    position = np.full(max(int(cash_flows.bond.max(initial=-1)), int(rows.max(initial=-1))) + 1, -1)
+    position[rows] = np.arange(len(rows))
+    accrued_bonds, accrued_flows, _, accrued, ex_coupon = cash_flows.accrued(settle, rows)
+    accrued_by_bond = np.zeros(len(rows))
+    accrued_by_bond[position[accrued_bonds]] = accrued
+
+    owner = position[cash_flows.bond]
+    live = owner >= 0
+    live[live] = cash_flows.date[live] > settle[owner[live]]
+    live[accrued_flows[ex_coupon]] = False
+    flows = np.flatnonzero(live)
+    owner = owner[flows]
+    times = (cash_flows.date[flows] - settle[owner]).astype("int64") / 365.0
+    return owner, flows, times, accrued_by_bond
+
+
+def coupon_frequency(df):
+    """Coupons per year of every bond, 1 for bonds without periodic coupons."""
+    months = (df["Coupon Frequency"].astype(object).map(FREQUENCY_MONTHS) if "Coupon Frequency" in df.columns
+              else pd.Series(np.nan, index=df.index))
+    return np.where(months.notna(), 12.0 / months.to_numpy(dtype="float64", na_value=np.nan), 1.0)
+
+
+def fixed_rate_rows(df):
+    """Row positions of fixed-rate bonds with a usable issue price and dates."""
+    def missing(column):
+        return df[column].isna().to_numpy() if column in df.columns else np.ones(len(df), dtype=bool)
+
+    price = number_array(df, "Issue Price")
+    percent = (df["Issue Price Format"].astype(object) == "PERCENT").to_numpy() if "Issue Price Format" in df.columns \
+        else np.zeros(len(df), dtype=bool)
+    issue, maturity = date_array(df, "Issue Date"), date_array(df, "Pricing Redemption Date")
+    zero_coupon = np.zeros(len(df), dtype=bool)
+    for column in ("Coupon Frequency", "Issue Type"):
+        if column in df.columns:
+            zero_coupon |= df[column].astype(object).isin(ZERO_COUPON).to_numpy()
+    usable = (missing("Reference Rate") & missing("Linked / Reference Index") & percent & (price > 0)
+              & (price < MAX_PRICE) & (number_array(df, "Nominal Amount") > 0) & (issue < maturity)
+              & ((number_array(df, "Coupon Rate") > 0) | zero_coupon))
+    return np.flatnonzero(usable)
+
+
+def bond_yields(cash_flows, df):
+    """
+    Yield to maturity, to call and to worst (percent) of every fixed-rate bond
+    at issue, indexed by row position, with the prices they were solved from.
+    """
+    rows = fixed_rate_rows(df)
+    settle = date_array(df, "Issue Date")[rows]
+    nominal = number_array(df, "Nominal Amount")[rows]
+    frequency = coupon_frequency(df)[rows]
+    clean = number_array(df, "Issue Price")[rows]
+
+    owner, flows, times, accrued = settlement_flows(cash_flows, rows, settle)
+    accrued_per_100 = accrued / nominal * 100.0
+    dirty = clean + accrued_per_100
+    per_100 = cash_flows.amount[flows] / nominal[owner] * 100.0
+    guess = number_array(df, "Coupon Rate")[rows] / 100.0
+    has_flows = np.bincount(owner, minlength=len(rows)) > 0
+    ytm = np.where(has_flows, solve_yields(owner, times, per_100, dirty, frequency, guess), np.nan)
+
+    # To call: coupons up to the call date, then par at the call date
+    call = date_array(df, "Call Date")[rows]
+    maturity = date_array(df, "Pricing Redemption Date")[rows]
+    callable_ = ~np.isnat(call) & (call > settle) & (call < maturity)
+    to_call = callable_[owner] & (cash_flows.kind[flows] == COUPON) & (cash_flows.date[flows] <= call[owner])
+    called = np.flatnonzero(callable_)
+    call_owner = np.concatenate([owner[to_call], called])
+    call_times = np.concatenate([times[to_call], (call[called] - settle[called]).astype("int64") / 365.0])
+    call_flows = np.concatenate([per_100[to_call], np.full(len(called), 100.0)])
+    ytc = np.full(len(rows), np.nan)
+    if len(called):
+        remap = np.full(len(rows), -1)
+        remap[called] = np.arange(len(called))
+        ytc[called] = solve_yields(remap[call_owner], call_times, call_flows, dirty[called], frequency[called],
+                                   guess[called])
+
+    return pd.DataFrame({
+        "Settlement": settle.astype("datetime64[ns]"),
+        "Clean Price": clean,
+        "Accrued per 100": accrued_per_100,
+        "Dirty Price": dirty,
+        "YTM (%)": ytm * 100.0,
+        "YTC (%)": ytc * 100.0,
+        "YTW (%)": np.fmin(ytm, ytc) * 100.0,
+    }, index=pd.Index(rows, name="Row"))
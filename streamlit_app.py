@@ -7,8 +7,19 @@ from streamlit_option_menu import option_menu
 import os
 import random
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+from bond_aggregates import (CSV_MEMORY_CAP_MB, LARGE_CSV_BYTES, build_aggregates, dataset_derived,
+                             load_upload_aggregates, status_box_stats)
+from bond_cashflows import build_cash_flows
+from bond_charts import (box_chart, cached_png, cash_flow_chart, draw_box, draw_cash_flows, draw_dv01, draw_issuers,
+                         draw_status_counts, dv01_chart, issuer_chart, status_count_chart)
+from bond_data import (file_fingerprint, load_cached_file, load_upload, load_upload_validation, shared_dataset,
+                       start_warmup, upload_digest, wait_for_warmup, warmup_error, warmup_ready)
+from bond_events import build_event_index
+from bond_floating import curve_key, project_floating, read_forward_curve
+from bond_lookup import build_bond_lookup
+from bond_risk import LIVE_STATUSES, RISK_GROUPS, aggregate_risk, bond_risk
+from bond_store import STORE_BONDS, load_store, upsert_store
+from bond_yields import bond_yields
 
 
 # Add the function here, at the top level of the file
@@ -1309,6 +1320,20 @@ if "selected_category" not in st.session_state:
 if "current_workflow" not in st.session_state:
     st.session_state.current_workflow = None
 
+# ----------- BOND DATA WARM-UP -----------
+# The default bond workbook is parsed, typed and pre-aggregated on a background
+# thread the first time the app runs in this process, so "Start Bond Analysis"
+# finds it ready. Later reruns are no-ops.
+DEFAULT_BOND_FILE = os.path.join("data", "data.xlsx")
+BOND_DERIVED = {
+    "aggregates": build_aggregates,
+    "status_box_stats": status_box_stats,
+    "cash_flows": build_cash_flows,
+    "lookup": build_bond_lookup,
+}
+if os.path.exists(DEFAULT_BOND_FILE):
+    start_warmup(DEFAULT_BOND_FILE, derived=BOND_DERIVED)
+
 # -------------------------------------------
 # SIDEBAR
 # -------------------------------------------
@@ -1360,33 +1385,89 @@ with st.sidebar:
 # -------------------------------------------
 # HELPER FUNCTION TO READ EXCEL/CSV
 # -------------------------------------------
-def load_data(file):
-    """Attempts to read an Excel or CSV file and return a DataFrame. Returns None on error."""
+def load_data(file, columns=None, nrows=None):
+    """
+    Attempts to read an Excel or CSV file and return a DataFrame. Returns None on error.
+    Only `columns` are materialised when given, and at most `nrows` rows.
+    """
     try:
         if isinstance(file, str):
-            # local path
-            if file.endswith(".xlsx"):
-                return pd.read_excel(file)
-            elif file.endswith(".csv"):
-                return pd.read_csv(file)
-            else:
-                return None
+            # local path: parsed once per file version, then read from the columnar snapshot
+            return load_cached_file(file, columns=columns, nrows=nrows)
         else:
-            # user-uploaded file
-            if file.name.endswith(".xlsx"):
-                return pd.read_excel(file)
-            elif file.name.endswith(".csv"):
-                return pd.read_csv(file)
-            else:
-                return None
+            # user-uploaded file: parsed once per distinct content, then served from the upload cache
+            return load_upload(file, columns=columns, nrows=nrows)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
 
 
+def show_validation_report(report):
+    """
+    Summarise cells that held a value but could not be read as their column's type
+    (they are treated as missing in every chart), with the rejected rows for download.
+    """
+    invalid = report["invalid_counts"]
+    invalid = invalid[invalid > 0].sort_values(ascending=False)
+    label = ("✅ Data quality: every value matched its column type" if report["rejected_rows"] == 0
+             else f"⚠️ Data quality: {report['rejected_rows']:,} row(s) with unreadable values")
+    with st.expander(label, expanded=False):
+        if report["rejected_rows"] == 0:
+            st.write(f"All {report['rows']:,} rows passed validation.")
+            return
+        st.write(
+            f"{report['rejected_rows']:,} of {report['rows']:,} rows have values that could not be converted "
+            "to their column's type. Those cells are treated as missing in the charts."
+        )
+        st.dataframe(
+            invalid.rename_axis("Column").reset_index(name="Invalid Cells"),
+            use_container_width=True, hide_index=True
+        )
+        rejected = report["rejected"]
+        if len(rejected) < report["rejected_rows"]:
+            st.caption(f"The download holds the first {len(rejected):,} rejected rows.")
+        st.download_button(
+            "Download rejected rows (CSV)",
+            data=rejected.to_csv(index=False).encode("utf-8"),
+            file_name="rejected_rows.csv",
+            mime="text/csv",
+        )
+
+
 # -------------------------------------------
 # BOND ANALYSIS WORKFLOW
 # -------------------------------------------
+def show_bond_record(bonds, row, cash_flows, yields, risk):
+    """One instrument's full record with its accrued interest, yields, risk and upcoming payments."""
+    record = bonds.iloc[row]
+    today = datetime.today().date()
+    st.markdown(f"**{record.get('Alpha Code')}** · {record.get('ISIN')} · {record.get('Issuer Name')} · "
+                f"{record.get('Instrument Status')}")
+
+    _, _, _, accrued, ex_coupon = cash_flows.accrued(today, [row])
+    nominal = record.get("Nominal Amount")
+    upcoming = cash_flows.of_bond(row, since=today)
+    col_acc, col_next, col_ytm, col_dur = st.columns(4)
+    if len(accrued) and pd.notna(nominal) and nominal > 0:
+        col_acc.metric("Accrued per 100 today", f"{accrued[0] / nominal * 100:.4f}",
+                       "ex coupon" if ex_coupon[0] else None, delta_color="off")
+    else:
+        col_acc.metric("Accrued per 100 today", "–")
+    col_next.metric("Next payment", f"{cash_flows.date[upcoming[0]]}" if len(upcoming) else "–")
+    col_ytm.metric("YTM at issue", f"{yields.at[row, 'YTM (%)']:.3f}%" if row in yields.index else "–")
+    col_dur.metric("Modified duration", f"{risk.at[row, 'Modified Duration']:.2f}" if row in risk.index else "–")
+
+    col_record, col_flows = st.columns([3, 2])
+    with col_record:
+        st.dataframe(record.astype("string").rename("Value").to_frame(), use_container_width=True, height=400)
+    with col_flows:
+        if len(upcoming):
+            st.dataframe(cash_flows.frame(bonds, [], positions=upcoming), use_container_width=True, hide_index=True,
+                         height=400)
+        else:
+            st.info("No payments left for this instrument.")
+
+
 def show_bond_analysis_workflow():
     """
     Enhanced Bond Data Analysis with interactive controls & multiple tabs:
@@ -1396,23 +1477,124 @@ def show_bond_analysis_workflow():
     """
     st.subheader("Bond Data Analysis – Interactive Plots")
 
+    # The first three tabs only read these columns; the full frame is kept for the lookup, cash-flow and risk tabs
+    view_columns = ["Issuer Name", "Instrument Status", "Maturity Date Year", "Issue Type", "Nominal Amount"]
+
     # Default path
-    default_file_path = os.path.join("data", "data.xlsx")
+    default_file_path = DEFAULT_BOND_FILE
 
     st.write("**Upload a more recent bond dataset** (XLSX or CSV). Otherwise, it loads `data/data.xlsx` by default.")
     user_file = st.file_uploader("Upload your bond data", type=["xlsx", "csv"])
 
+    total_rows = None
+    upload_mode = st.radio(
+        "Use an uploaded file to",
+        ["Replace the dataset", "Upsert into the local store (by ISIN)"],
+        horizontal=True,
+    )
+    aggregates = None
+    box_stats = None
+    validation = None
+    # Identifies the data version behind the charts, for the rendered-figure cache
+    dataset_key = None
+    # Every column of every bond, for the per-bond analytics tabs (None for chunked uploads)
+    dataset = None
+    bonds = None
+
     # Load data
-    if user_file:
-        df = load_data(user_file)
-        if df is not None:
+    if upload_mode.startswith("Upsert"):
+        if user_file and st.button("Upsert into store", key="bond_upsert"):
+            incoming = load_data(user_file)
+            if incoming is None:
+                st.error("Could not load the uploaded file. Please try again.")
+                return
+            # A new store starts from the default workbook, so the first extract reports a real delta
+            seed = load_data(default_file_path) if os.path.exists(default_file_path) else None
+            try:
+                _, _, delta = upsert_store(incoming, seed=seed)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.session_state.bond_upsert_delta = delta
+
+        bonds, aggregates = load_store()
+        if bonds is None:
+            st.info("The local store is empty. Upload an extract and press **Upsert into store** to create it.")
+            return
+        df = bonds[[column for column in view_columns if column in bonds.columns]]
+        preview = bonds.head()
+        dataset_key = ("store", file_fingerprint(STORE_BONDS))
+        st.success(f"Using the local bond store ({len(df):,} bonds).")
+        if user_file:
+            validation = load_upload_validation(user_file)
+
+        delta = st.session_state.get("bond_upsert_delta")
+        if delta:
+            with st.expander("Last upsert", expanded=True):
+                st.markdown(
+                    f"**Inserted**: {len(delta['inserted']):,} · **Updated**: {len(delta['updated']):,} · "
+                    f"**Unchanged**: {delta['unchanged']:,}"
+                )
+                if len(delta["changes"]):
+                    st.dataframe(delta["changes"].astype(str), use_container_width=True)
+                if delta["issuers"] or delta["years"]:
+                    st.caption(
+                        f"Aggregates recomputed for {len(delta['issuers'])} issuer(s) and "
+                        f"maturity year(s) {', '.join(str(year) for year in delta['years'])}."
+                    )
+    elif user_file and user_file.name.endswith(".csv") and user_file.size > LARGE_CSV_BYTES:
+        # Too large to parse in one go: fold the file into aggregates chunk by chunk
+        memory_cap_mb = st.number_input(
+            "Memory cap for large CSV aggregation (MB)", min_value=16, max_value=8192,
+            value=CSV_MEMORY_CAP_MB, step=16
+        )
+        preview = load_data(user_file, nrows=5)
+        progress_bar = st.progress(0.0, text="Aggregating large CSV in chunks...")
+        try:
+            aggregates = load_upload_aggregates(user_file, memory_cap_mb, progress=progress_bar.progress)
+        except Exception as e:
+            st.error(f"Error loading data: {e}")
+            return
+        finally:
+            progress_bar.empty()
+        # The tabs read the cube merged over every chunk; only a bounded per-status sample is kept as rows
+        df = aggregates["sample"]
+        total_rows = aggregates["rows"]
+        dataset_key = ("upload", upload_digest(user_file))
+        st.success(f"Using uploaded file: {user_file.name} (aggregated in chunks under {memory_cap_mb} MB)")
+    elif user_file:
+        # One parse per upload serves the per-bond analytics, the tab view, the preview and the validation report
+        bonds = load_data(user_file)
+        if bonds is not None:
+            df = bonds[[column for column in view_columns if column in bonds.columns]]
+            preview = bonds.head()
             st.success(f"Using uploaded file: {user_file.name}")
+            validation = load_upload_validation(user_file)
+            dataset_key = ("upload", upload_digest(user_file))
         else:
             st.error("Could not load the uploaded file. Please try again.")
             return
     else:
         if os.path.exists(default_file_path):
-            df = load_data(default_file_path)
+            # One memory-mapped copy per process, shared read-only by every session
+            if not warmup_ready(default_file_path):
+                with st.spinner("Preparing the default bond dataset (first load since the app started)..."):
+                    wait_for_warmup(default_file_path)
+            if warmup_error(default_file_path) is not None:
+                st.warning(f"Preparing the default dataset in the background failed "
+                           f"({warmup_error(default_file_path)}); loading it now instead.")
+            try:
+                dataset = shared_dataset(default_file_path)
+            except Exception as e:
+                st.error(f"Error loading data: {e}")
+                return
+            df = dataset.view()
+            preview = df.head()
+            aggregates = dataset.derived("aggregates", BOND_DERIVED["aggregates"])
+            box_stats = dataset.derived("status_box_stats", BOND_DERIVED["status_box_stats"])
+            validation = dataset.validation
+            dataset_key = ("default", dataset.key)
+            bonds = df
             st.warning("No file uploaded; using default `data/data.xlsx`.")
         else:
             st.error("No file uploaded, and `data/data.xlsx` not found. Please check your setup.")
@@ -1424,20 +1606,63 @@ def show_bond_analysis_workflow():
         return
 
     st.markdown("### Data Preview (Top 5 Rows)")
-    st.dataframe(df.head(), use_container_width=True)
-    st.markdown(f"**Total Rows**: {len(df):,}")
-
-    # Basic cleaning / type conversions
-    # Possibly filter columns if needed
-    if "Issue Date" in df.columns:
-        df["Issue Date"] = pd.to_datetime(df["Issue Date"], errors="coerce")
-    if "Maturity Date Year" in df.columns:
-        df["Maturity Date Year"] = pd.to_numeric(df["Maturity Date Year"], errors="coerce")
-    if "Nominal Amount" in df.columns:
-        df["Nominal Amount"] = pd.to_numeric(df["Nominal Amount"], errors="coerce")
+    st.dataframe(preview if preview is not None else df.head(), use_container_width=True)
+    if total_rows is None:
+        total_rows = len(df)
+    st.markdown(f"**Total Rows**: {total_rows:,}")
+    if validation is not None:
+        show_validation_report(validation)
+
+    # Columns arrive already typed (see BOND_SCHEMA in bond_data.py), so no per-rerun coercion here.
+    # Every tab reads the aggregate cube (see bond_aggregates.py); the store keeps its own up to date on upsert.
+    if aggregates is None:
+        aggregates = dataset_derived(dataset_key, "aggregates", build_aggregates, df)
+    if box_stats is None and total_rows == len(df):
+        box_stats = dataset_derived(dataset_key, "status_box_stats", status_box_stats, df)
+
+    def bond_analytics(name, build):
+        """build(bonds), once per dataset version: on the shared dataset, or in the upload cache."""
+        if dataset is not None:
+            return dataset.derived(name, build)
+        return dataset_derived(dataset_key, name, build, bonds)
+
+    def bond_yields_at_issue():
+        cash_flows = bond_analytics("cash_flows", build_cash_flows)
+        return bond_analytics("yields", lambda frame: bond_yields(cash_flows, frame))
+
+    def bond_risk_on(valuation):
+        """Per-bond risk on `valuation`, cached per dataset version and date."""
+        cash_flows = bond_analytics("cash_flows", build_cash_flows)
+        yields = bond_yields_at_issue()
+        return dataset_derived(dataset_key, ("risk", str(valuation)),
+                               lambda frame: bond_risk(cash_flows, frame, valuation, yields), bonds)
+
+    # Single-instrument lookup: a dict access on the ISIN / Alpha Code index, never a filter over the frame
+    if bonds is not None:
+        st.markdown("### Instrument Lookup")
+        code = st.text_input("ISIN or Alpha Code", key="bond_lookup", placeholder="e.g. AEC01U or ZAG000192154")
+        if code.strip():
+            row = bond_analytics("lookup", build_bond_lookup).find(code)
+            if row is None:
+                st.warning(f"No instrument with ISIN or Alpha Code `{code.strip()}`.")
+            else:
+                show_bond_record(bonds, row, bond_analytics("cash_flows", build_cash_flows), bond_yields_at_issue(),
+                                 bond_risk_on(datetime.today().date()))
+    else:
+        st.info("Instrument lookup needs every column of the bond file; it is not available for chunked CSV uploads.")
+
+    # Browser rendering ships only the aggregated rows behind each chart; server rendering draws PNGs here
+    chart_mode = st.radio(
+        "Chart rendering",
+        ["Browser (interactive)", "Server (matplotlib)"],
+        horizontal=True,
+        help="Browser charts are drawn client-side from pre-aggregated data and keep the server light.",
+    )
+    render_in_browser = chart_mode.startswith("Browser")
 
     # Create 3 separate tabs for the charts
-    tabs = st.tabs(["Distribution Plot", "Count by Year", "Top Issuers"])
+    tabs = st.tabs(["Distribution Plot", "Count by Year", "Top Issuers", "Cash Flows", "Accrued Interest", "Yields",
+                    "Risk", "Events"])
 
     # ------------------------------------------
     # TAB 1: Distribution of Nominal Amount
@@ -1447,19 +1672,27 @@ def show_bond_analysis_workflow():
         if not {"Instrument Status", "Nominal Amount"}.issubset(df.columns):
             st.warning("Missing columns 'Instrument Status' or 'Nominal Amount'. Cannot create this plot.")
         else:
-            fig1, ax1 = plt.subplots(figsize=(8, 5))
-            sns.boxplot(
-                x="Instrument Status",
-                y="Nominal Amount",
-                data=df,
-                palette="Set2",
-                ax=ax1
-            )
-            ax1.set_title("Distribution of Nominal Amount by Instrument Status")
-            ax1.set_xlabel("Instrument Status")
-            ax1.set_ylabel("Nominal Amount")
-            plt.xticks(rotation=45)
-            st.pyplot(fig1)
+            if box_stats is None:
+                # Chunked uploads keep no full rows: quartiles come from the cube's sketches, without outliers
+                box_stats = aggregates["cube"].box_stats(["Instrument Status"])
+            if render_in_browser:
+                st.altair_chart(
+                    box_chart(box_stats, "Distribution of Nominal Amount by Instrument Status"),
+                    use_container_width=True
+                )
+            else:
+                st.image(cached_png(
+                    dataset_key, "status_box", (),
+                    lambda ax: draw_box(ax, box_stats, "Distribution of Nominal Amount by Instrument Status")
+                ))
+            shown = sum(len(stat["fliers"]) for stat in box_stats)
+            outliers = sum(stat.get("n_fliers", 0) for stat in box_stats)
+            if total_rows > len(df):
+                st.caption(f"Quartiles and whiskers from the aggregate cube over all {total_rows:,} rows; quartiles "
+                           "are interpolated like exact ones and within 1% of them. Outliers are not drawn.")
+            elif shown < outliers:
+                st.caption(f"Exact quartiles and whiskers over all {total_rows:,} rows; "
+                           f"showing {shown:,} of {outliers:,} outliers (the most extreme plus a random sample).")
 
     # ------------------------------------------
     # TAB 2: Count of Issues by Maturity Year
@@ -1470,33 +1703,47 @@ def show_bond_analysis_workflow():
         if "Maturity Date Year" not in df.columns:
             st.warning("Missing 'Maturity Date Year' column. Cannot create this plot.")
         else:
-            # Let user pick a range or single year
-            valid_years = df["Maturity Date Year"].dropna().unique()
-            if len(valid_years) == 0:
+            # Let user pick a range or single year; counts come from running totals per year, not the rows
+            year_index = aggregates["year_index"]
+            if len(year_index.years) == 0:
                 st.warning("No valid maturity year data found.")
             else:
-                min_year, max_year = int(valid_years.min()), int(valid_years.max())
-                selected_year = st.slider(
-                    "Select a Maturity Year",
-                    min_value=min_year,
-                    max_value=max_year,
-                    value=min_year
-                )
-                year_data = df[df["Maturity Date Year"] == selected_year].copy()
-                if year_data.empty:
-                    st.info(f"No data for year = {selected_year}.")
+                min_year, max_year = int(year_index.years.min()), int(year_index.years.max())
+                # A slider needs a range: with a single maturity year there is nothing to choose
+                if min_year == max_year:
+                    start_year = end_year = min_year
+                    years_label = str(min_year)
+                elif st.radio("Maturity years", ["Single year", "Range of years"], horizontal=True) == "Single year":
+                    selected_year = st.slider(
+                        "Select a Maturity Year",
+                        min_value=min_year,
+                        max_value=max_year,
+                        value=min_year
+                    )
+                    start_year = end_year = selected_year
+                    years_label = str(selected_year)
                 else:
-                    fig2, ax2 = plt.subplots(figsize=(8, 5))
-                    sns.countplot(
-                        y="Instrument Status",
-                        data=year_data,
-                        palette="coolwarm",
-                        ax=ax2
+                    start_year, end_year = st.slider(
+                        "Select a range of Maturity Years",
+                        min_value=min_year,
+                        max_value=max_year,
+                        value=(min_year, max_year)
                     )
-                    ax2.set_title(f"Instrument Status Distribution in {selected_year}")
-                    ax2.set_ylabel("Instrument Status")
-                    ax2.set_xlabel("Count")
-                    st.pyplot(fig2)
+                    years_label = f"{start_year}–{end_year}"
+                status_counts = year_index.counts(start_year, end_year)
+                if status_counts.empty:
+                    st.info(f"No data for year = {years_label}.")
+                elif render_in_browser:
+                    st.altair_chart(
+                        status_count_chart(status_counts, f"Instrument Status Distribution in {years_label}"),
+                        use_container_width=True
+                    )
+                else:
+                    st.image(cached_png(
+                        dataset_key, "status_counts", (start_year, end_year),
+                        lambda ax: draw_status_counts(ax, status_counts,
+                                                      f"Instrument Status Distribution in {years_label}")
+                    ))
 
     # ------------------------------------------
     # TAB 3: Top Issuers by Nominal Amount
@@ -1506,20 +1753,280 @@ def show_bond_analysis_workflow():
         if not {"Issuer Name", "Nominal Amount"}.issubset(df.columns):
             st.warning("Missing 'Issuer Name' or 'Nominal Amount'. Cannot create this plot.")
         else:
-            max_issuers = 15
-            top_n = st.slider("How many top issuers?", 1, max_issuers, 5, step=1)
-            grouped = df.groupby("Issuer Name")["Nominal Amount"].sum().nlargest(top_n)
-            if grouped.empty:
+            ranking = aggregates["issuer_ranking"]
+            if len(ranking) == 0:
                 st.info("No valid issuer data found.")
             else:
-                fig3, ax3 = plt.subplots(figsize=(8, 5))
-                grouped.plot(kind="bar", ax=ax3, color="skyblue")
-                ax3.set_title(f"Top {top_n} Issuers by Total Nominal Amount")
-                ax3.set_xlabel("Issuer Name")
-                ax3.set_ylabel("Total Nominal Amount")
-                plt.xticks(rotation=60)
-                plt.tight_layout()
-                st.pyplot(fig3)
+                # The ranking is sorted once per dataset; the chart and each table page are slices of it
+                max_issuers = min(len(ranking), 50)
+                # A slider needs a range: with a single issuer there is nothing to choose
+                top_n = (st.slider("How many top issuers?", 1, max_issuers, min(5, max_issuers), step=1)
+                         if max_issuers > 1 else 1)
+                grouped = ranking.top(top_n)
+                if render_in_browser:
+                    st.altair_chart(
+                        issuer_chart(grouped, f"Top {top_n} Issuers by Total Nominal Amount"),
+                        use_container_width=True
+                    )
+                else:
+                    st.image(cached_png(
+                        dataset_key, "top_issuers", (top_n,),
+                        lambda ax: draw_issuers(ax, grouped, f"Top {top_n} Issuers by Total Nominal Amount")
+                    ))
+
+                st.markdown(f"##### Issuer league table ({len(ranking):,} issuers)")
+                col_size, col_page = st.columns(2)
+                with col_size:
+                    page_size = st.selectbox("Rows per page", [25, 50, 100], index=0)
+                with col_page:
+                    page = st.number_input("Page", min_value=1, max_value=ranking.pages(page_size), value=1, step=1)
+                st.dataframe(
+                    ranking.page(page, page_size),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Nominal Amount": st.column_config.NumberColumn(format="%.0f"),
+                        "Share": st.column_config.NumberColumn(format="percent"),
+                    },
+                )
+
+    # ------------------------------------------
+    # TAB 4: Projected Cash Flows
+    # ------------------------------------------
+    with tabs[3]:
+        st.markdown("#### 4) Projected Coupon and Redemption Cash Flows")
+        if bonds is None:
+            st.info("Cash flows need every column of the bond file; they are not available for chunked CSV uploads.")
+        else:
+            cash_flows = bond_analytics("cash_flows", build_cash_flows)
+
+            # Floating-rate coupons: carried at their last fixing, shifted, or re-projected from a forward curve
+            projection = st.radio("Floating-rate coupons", ["Last fixing", "Flat shock", "Forward curve (CSV)"],
+                                  horizontal=True, key="frn_projection")
+            curve, shock_bps = None, 0
+            if projection == "Forward curve (CSV)":
+                curve_file = st.file_uploader("Forward curve: Tenor (years or 3M/1Y), Rate (%) and optionally "
+                                              "Reference Rate", type=["csv"], key="frn_curve")
+                if curve_file is not None:
+                    try:
+                        curve = read_forward_curve(curve_file)
+                    except ValueError as err:
+                        st.error(f"Could not read the forward curve: {err}")
+            if projection != "Last fixing":
+                shock_bps = st.slider("Parallel shock (bps)", -500, 500, 0, step=25, key="frn_shock")
+            projection_key = None
+            if curve is not None or shock_bps:
+                valuation = datetime.today().date()
+                projection_key = ("floating", curve_key(curve, shock_bps), str(valuation))
+                base_flows = cash_flows
+                cash_flows = dataset_derived(
+                    dataset_key, projection_key,
+                    lambda frame: project_floating(base_flows, frame, valuation, curve, shock_bps), bonds
+                )
+
+            col_from, col_horizon = st.columns(2)
+            with col_from:
+                flows_from = st.date_input("Cash flows from", value=datetime.today().date(), key="cash_flows_from")
+            with col_horizon:
+                horizon_years = st.slider("Horizon (years)", 1, 30, 5, key="cash_flows_horizon")
+            flows_to = (pd.Timestamp(flows_from) + pd.DateOffset(years=horizon_years) - pd.Timedelta(days=1)).date()
+            in_window = cash_flows.between(flows_from, flows_to)
+            monthly = cash_flows.by_month(flows_from, flows_to)
+
+            coupons = monthly["Coupon"].sum() if "Coupon" in monthly else 0.0
+            redemptions = monthly["Redemption"].sum() if "Redemption" in monthly else 0.0
+            col_c, col_r, col_n = st.columns(3)
+            col_c.metric("Coupons", f"R {coupons:,.0f}")
+            col_r.metric("Redemptions", f"R {redemptions:,.0f}")
+            col_n.metric("Payments", f"{int(in_window.sum()):,}")
+
+            if monthly.empty:
+                st.info(f"No projected cash flows between {flows_from} and {flows_to}.")
+            else:
+                title = f"Projected cash flows per month, {flows_from:%b %Y} – {flows_to:%b %Y}"
+                if render_in_browser:
+                    st.altair_chart(cash_flow_chart(monthly, title), use_container_width=True)
+                else:
+                    st.image(cached_png(
+                        dataset_key, "cash_flows", (flows_from, flows_to, projection_key),
+                        lambda ax: draw_cash_flows(ax, monthly, title)
+                    ))
+
+                flow_columns = ["Alpha Code", "ISIN", "Issuer Name", "Instrument Status", "Reference Rate"]
+                table = cash_flows.frame(bonds, flow_columns, in_window).sort_values("Pay Date", kind="stable")
+                st.dataframe(table.head(1000), use_container_width=True, hide_index=True)
+                st.caption("Fixed coupons use the current Coupon Rate; floating-rate coupons reset after today follow "
+                           "the projection chosen above. Dates are not business-day adjusted."
+                           + (f" Showing the first 1,000 of {len(table):,} payments." if len(table) > 1000 else ""))
+                st.download_button(
+                    "Download cash flows (CSV)",
+                    data=lambda: table.to_csv(index=False).encode("utf-8"),
+                    file_name=f"cash_flows_{flows_from}_{flows_to}.csv",
+                    mime="text/csv",
+                )
+
+    # ------------------------------------------
+    # TAB 5: Accrued Interest
+    # ------------------------------------------
+    with tabs[4]:
+        st.markdown("#### 5) Accrued Interest as of a Settlement Date")
+        if bonds is None:
+            st.info("Accrued interest needs every column of the bond file; it is not available for chunked CSV uploads.")
+        else:
+            cash_flows = bond_analytics("cash_flows", build_cash_flows)
+            settlement = st.date_input("Settlement date", value=datetime.today().date(), key="accrued_settlement")
+            accrued = cash_flows.accrued_frame(
+                bonds, ["Alpha Code", "ISIN", "Issuer Name", "Issue Type", "Coupon Rate", "Day count convention",
+                        "Nominal Amount"], settlement, statuses=LIVE_STATUSES
+            )
+            col_b, col_x, col_a = st.columns(3)
+            col_b.metric("Bonds accruing", f"{len(accrued):,}")
+            col_x.metric("Trading ex coupon", f"{int(accrued['Ex Coupon'].sum()):,}")
+            col_a.metric("Total accrued interest", f"R {accrued['Accrued Interest'].sum():,.0f}")
+
+            if accrued.empty:
+                st.info(f"No bond is in a coupon period on {settlement}.")
+            else:
+                st.dataframe(accrued, use_container_width=True, hide_index=True)
+                st.caption(f"Over bonds with status {', '.join(LIVE_STATUSES)}. Interest accrues from the previous "
+                           "coupon date under each bond's day count (actual days without one). After the books close "
+                           "date a bond trades ex coupon and its accrued interest is negative.")
+                st.download_button(
+                    "Download accrued interest (CSV)",
+                    data=lambda: accrued.to_csv(index=False).encode("utf-8"),
+                    file_name=f"accrued_interest_{settlement}.csv",
+                    mime="text/csv",
+                )
+
+    # ------------------------------------------
+    # TAB 6: Yields
+    # ------------------------------------------
+    with tabs[5]:
+        st.markdown("#### 6) Yield to Maturity, Call and Worst at Issue")
+        if bonds is None:
+            st.info("Yields need every column of the bond file; they are not available for chunked CSV uploads.")
+        else:
+            yields = bond_yields_at_issue()
+            yield_columns = ["Alpha Code", "ISIN", "Issuer Name", "Issue Type", "Coupon Rate", "Coupon Frequency",
+                             "Pricing Redemption Date", "Call Date"]
+            table = pd.concat([
+                bonds.iloc[yields.index][[column for column in yield_columns if column in bonds.columns]]
+                .reset_index(drop=True),
+                yields.reset_index(drop=True),
+            ], axis=1)
+            if ("Pricing Redemption Date" in table.columns
+                    and st.checkbox("Only bonds not yet redeemed", value=True, key="yields_outstanding")):
+                table = table[table["Pricing Redemption Date"] >= pd.Timestamp(datetime.today().date())]
+
+            col_n, col_m, col_c = st.columns(3)
+            col_n.metric("Fixed-rate bonds", f"{len(table):,}")
+            col_m.metric("Median YTM", f"{table['YTM (%)'].median():.2f}%" if len(table) else "–")
+            col_c.metric("Callable before maturity", f"{int(table['YTC (%)'].notna().sum()):,}")
+            st.dataframe(table, use_container_width=True, hide_index=True)
+            st.caption("Solved at each bond's Issue Date from its Issue Price (clean, per 100 nominal) since the "
+                       "data has no market prices. Yields compound at the coupon frequency; yield to call redeems "
+                       "at par on the Call Date. Floating-rate and inflation-linked notes are not included.")
+
+    # ------------------------------------------
+    # TAB 7: Interest-Rate Risk
+    # ------------------------------------------
+    with tabs[6]:
+        st.markdown("#### 7) Duration, Convexity and DV01")
+        if bonds is None:
+            st.info("Risk needs every column of the bond file; it is not available for chunked CSV uploads.")
+        else:
+            valuation = datetime.today().date()
+            risk = bond_risk_on(valuation)
+
+            col_by, col_type, col_sector = st.columns([1, 1, 2])
+            with col_by:
+                group_by = st.selectbox("Group by", RISK_GROUPS, key="risk_group_by")
+            with col_type:
+                rate_types = st.multiselect("Rate type", ["Fixed", "Floating"], default=["Fixed", "Floating"],
+                                            key="risk_rate_types")
+            with col_sector:
+                sectors = st.multiselect("Sub Sector (all when empty)",
+                                         sorted(risk["Sub Sector"].dropna().astype(str).unique()), key="risk_sectors")
+            selected = risk[risk["Rate Type"].isin(rate_types)]
+            if sectors:
+                selected = selected[selected["Sub Sector"].astype(str).isin(sectors)]
+
+            market_value = selected["Market Value"].sum()
+            col_mv, col_dv, col_md = st.columns(3)
+            col_mv.metric("Market value", f"R {market_value:,.0f}")
+            col_dv.metric("DV01", f"R {selected['DV01'].sum():,.0f}")
+            col_md.metric("Modified duration",
+                          f"{(selected['Modified Duration'] * selected['Market Value']).sum() / market_value:.2f}"
+                          if market_value else "–")
+
+            if selected.empty:
+                st.info("No bonds match the selected filters.")
+            else:
+                table = aggregate_risk(selected, group_by)
+                top = table["DV01"].head(20)
+                title = f"DV01 by {group_by} (top {len(top)})"
+                if render_in_browser:
+                    st.altair_chart(dv01_chart(top, title), use_container_width=True)
+                else:
+                    st.image(cached_png(
+                        dataset_key, "dv01", (str(valuation), group_by, tuple(rate_types), tuple(sectors)),
+                        lambda ax: draw_dv01(ax, top, title)
+                    ))
+                st.dataframe(table, use_container_width=True)
+                st.caption(f"Valued on {valuation}, over bonds with status {', '.join(LIVE_STATUSES)}. "
+                           "Bonds are discounted at their yield at issue where one was "
+                           "solved, else their coupon rate; floating-rate notes reprice at their next coupon date. "
+                           "Durations and convexity are market-value weighted; DV01 is in rand per basis point.")
+
+    # ------------------------------------------
+    # TAB 8: Events Calendar
+    # ------------------------------------------
+    with tabs[7]:
+        st.markdown("#### 8) Books Close, Coupon and Redemption Calendar")
+        if bonds is None:
+            st.info("The events calendar needs every column of the bond file; it is not available for chunked CSV "
+                    "uploads.")
+        else:
+            cash_flows = bond_analytics("cash_flows", build_cash_flows)
+            events = bond_analytics("events", lambda frame: build_event_index(cash_flows, frame))
+            today = datetime.today().date()
+            col_from, col_to, col_day = st.columns(3)
+            with col_from:
+                events_from = st.date_input("Events from", value=today, key="events_from")
+            with col_to:
+                events_to = st.date_input("Events to", value=today + pd.Timedelta(days=30), key="events_to")
+            with col_day:
+                closed_day = st.date_input("Books closed on", value=today, key="events_closed_day")
+
+            found = events.events_between(events_from, events_to)
+            counts = events.counts(events_from, events_to)
+            metric_columns = st.columns(len(counts) + 1)
+            for column, (label, count) in zip(metric_columns, counts.items()):
+                column.metric(label, f"{count:,}")
+            metric_columns[-1].metric(f"In books closed on {closed_day}", f"{events.closed_count(closed_day):,}")
+
+            event_columns = ["Alpha Code", "ISIN", "Issuer Name", "Instrument Status"]
+            if len(found) == 0:
+                st.info(f"No events between {events_from} and {events_to}.")
+            else:
+                st.markdown("##### Events per day")
+                st.dataframe(events.calendar(events_from, events_to), use_container_width=True)
+                st.markdown("##### Events")
+                st.dataframe(events.frame(bonds, event_columns, found[:1000]), use_container_width=True,
+                             hide_index=True)
+                if len(found) > 1000:
+                    st.caption(f"Showing the first 1,000 of {len(found):,} events.")
+
+            st.markdown(f"##### Bonds in books closed on {closed_day}")
+            closed = events.closed_on(closed_day)
+            if len(closed):
+                st.dataframe(events.closed_frame(bonds, event_columns, closed), use_container_width=True,
+                             hide_index=True)
+            else:
+                st.info(f"No bond is in its books-closed period on {closed_day}.")
+            st.caption("Books close dates are the listed Coupon Dates / Books Close Dates pairs; coupons after a "
+                       "bond's last listed one use the Books Closed Period before the projected coupon. A bond is "
+                       "books closed from the day after its books close date until the coupon is paid.")
 
     st.success("Interactive Bond Data Analysis complete! Adjust year/issuer/top-n to see different views.")
 
@@ -2176,6 +2683,10 @@ elif selected == "Workflows":
         """, unsafe_allow_html=True)
         if st.button("▶ Start Bond Analysis", key="start_bond_analysis"):
             st.session_state.current_workflow = "bond_analysis"
+        if warmup_ready(DEFAULT_BOND_FILE):
+            st.caption("✅ Default bond dataset ready")
+        else:
+            st.caption("⏳ Default bond dataset warming up...")
 
     with col2:
         # RCF Calculator Card